@@ -0,0 +1,68 @@
+"""Grouped means, counts and analytic confidence intervals.
+
+``aggregate()`` computes count, mean and the sum of squared deviations
+(``m2``) of a value per group in one groupby pass and adds a normal
+approximation confidence interval, so bar charts can plot precomputed arrays
+instead of having seaborn bootstrap every cell.  ``count``/``mean``/``m2``
+frames from separate chunks can be merged with ``combine()``.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+CONFIDENCE = 0.95
+
+MOMENTS = ['count', 'mean', 'm2']
+
+
+def moments(df, by, value):
+    """Return ``count``, ``mean`` and ``m2`` of ``value`` per ``by`` group."""
+    values = df[value].astype('float64')
+    keys = [df[key] for key in ([by] if isinstance(by, str) else by)]
+    stats = values.groupby(keys, observed=True).agg(['count', 'mean', 'var'])
+    stats['m2'] = (stats.pop('var') * (stats['count'] - 1)).fillna(0.0)
+    return stats
+
+
+def combine(a, b):
+    """Merge two ``moments()`` frames as if their rows had been grouped together.
+
+    A group with no observations on one side (count 0, mean NaN) takes the
+    other side's moments unchanged.
+    """
+    a, b = a[MOMENTS].align(b[MOMENTS], join='outer', fill_value=0)
+    index = a.index
+    (na, ma, sa), (nb, mb, sb) = (frame.to_numpy(dtype=np.float64).T for frame in (a, b))
+    count = na + nb
+    delta = mb - ma
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.nan_to_num(nb / count)
+        mean = ma + delta * weight
+        m2 = sa + sb + delta ** 2 * na * weight
+    mean = np.where(nb == 0, ma, np.where(na == 0, mb, mean))
+    m2 = np.where(nb == 0, sa, np.where(na == 0, sb, m2))
+    return pd.DataFrame({'count': count.astype('int64'), 'mean': mean, 'm2': m2}, index=index)
+
+
+def summarize(stats, confidence=CONFIDENCE):
+    """Add ``std``, ``sem``, ``ci_low`` and ``ci_high`` to a ``moments()`` frame.
+
+    Groups with a single observation get a NaN interval.
+    """
+    stats = stats.copy()
+    count = stats['count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats['std'] = np.sqrt(stats['m2'] / (count - 1)).where(count > 1)
+        stats['sem'] = stats['std'] / np.sqrt(count)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    stats['ci_low'] = stats['mean'] - z * stats['sem']
+    stats['ci_high'] = stats['mean'] + z * stats['sem']
+    return stats
+
+
+def aggregate(df, by, value, confidence=CONFIDENCE):
+    """Mean, count and confidence interval of ``value`` per ``by`` group."""
+    return summarize(moments(df, by, value), confidence)
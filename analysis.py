@@ -0,0 +1,145 @@
+"""Vectorized GDP vs life expectancy statistics.
+
+The long ``df`` is scattered once into a ``panel.Panel`` of dense Country x
+Year arrays (NaN where a country has no observation), or such a panel is
+passed in, and every statistic is computed with masked NumPy reductions
+along one axis of those arrays: along years for the per-country results,
+along countries for the per-year results and over the flattened arrays for
+the pooled result.  There are no Python loops or per-group ``apply`` calls
+over countries or years.
+
+``correlate()`` returns Pearson and Spearman correlations and an OLS fit of
+``LEABY`` on log10 GDP; ``growth_rates()`` returns year-over-year growth.
+"""
+
+import numpy as np
+import pandas as pd
+
+from panel import Panel
+
+
+def to_arrays(df, x='GDP', y='LEABY'):
+    """Return ``(countries, years, X, Y)`` with ``X``/``Y`` shaped Country x Year.
+
+    ``df`` is the long frame or a ``panel.Panel`` of it.
+    """
+    panel = df if isinstance(df, Panel) else Panel.from_frame(df, (x, y))
+    X = panel[x].astype(np.float64)
+    Y = panel[y].astype(np.float64)
+    return panel.countries, panel.years, X, Y
+
+
+def _moments(x, y, axis):
+    mask = np.isfinite(x) & np.isfinite(y)
+    n = mask.sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = np.where(mask, x, 0.0).sum(axis=axis, keepdims=True) / np.expand_dims(n, axis)
+        my = np.where(mask, y, 0.0).sum(axis=axis, keepdims=True) / np.expand_dims(n, axis)
+        dx = np.where(mask, x - mx, 0.0)
+        dy = np.where(mask, y - my, 0.0)
+    sxx = (dx * dx).sum(axis=axis)
+    syy = (dy * dy).sum(axis=axis)
+    sxy = (dx * dy).sum(axis=axis)
+    return n, mx.squeeze(axis), my.squeeze(axis), sxx, syy, sxy
+
+
+def pearson(x, y, axis=-1):
+    """Pearson r of ``x`` and ``y`` along ``axis``, ignoring pairs with a NaN."""
+    n, _, _, sxx, syy, sxy = _moments(x, y, axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = sxy / np.sqrt(sxx * syy)
+    return np.where(n > 1, r, np.nan)
+
+
+def ols(x, y, axis=-1):
+    """Least squares ``y = intercept + slope * x`` along ``axis``.
+
+    Returns ``(n, slope, intercept, r2)``.
+    """
+    n, mx, my, sxx, syy, sxy = _moments(x, y, axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = sxy / sxx
+        r2 = sxy * sxy / (sxx * syy)
+    slope = np.where(n > 1, slope, np.nan)
+    return n, slope, my - slope * mx, np.where(n > 1, r2, np.nan)
+
+
+def rankdata(a, axis=-1):
+    """Average ranks (1-based) of ``a`` along ``axis``; NaNs stay NaN."""
+    a = np.ascontiguousarray(np.moveaxis(np.asarray(a, dtype=np.float64), axis, -1))
+    order = np.argsort(a, axis=-1)
+    s = np.take_along_axis(a, order, axis=-1)
+    size = s.shape[-1]
+    pos = np.broadcast_to(np.arange(size), s.shape)
+    # Runs of equal values share the mean of their first and last position.
+    starts = np.ones(s.shape, dtype=bool)
+    starts[..., 1:] = s[..., 1:] != s[..., :-1]
+    ends = np.ones(s.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=-1)
+    last = np.minimum.accumulate(np.where(ends, pos, size)[..., ::-1], axis=-1)[..., ::-1]
+    ranks = np.empty(s.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2.0 + 1.0, axis=-1)
+    ranks[np.isnan(a)] = np.nan
+    return np.moveaxis(ranks, -1, axis)
+
+
+def spearman(x, y, axis=-1):
+    """Spearman rho of ``x`` and ``y`` along ``axis`` over pairs without NaN."""
+    mask = np.isfinite(x) & np.isfinite(y)
+    x = np.where(mask, x, np.nan)
+    y = np.where(mask, y, np.nan)
+    return pearson(rankdata(x, axis), rankdata(y, axis), axis)
+
+
+def _log10(x):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(x > 0, np.log10(x), np.nan)
+
+
+def _table(scope, keys, x, y, axis):
+    n, slope, intercept, r2 = ols(_log10(x), y, axis)
+    return pd.DataFrame({
+        'scope': scope,
+        'key': keys,
+        'n': n,
+        'pearson': pearson(x, y, axis),
+        'spearman': spearman(x, y, axis),
+        'slope': slope,
+        'intercept': intercept,
+        'r2': r2,
+    })
+
+
+def correlate(df, x='GDP', y='LEABY'):
+    """Correlation of ``x`` and ``y`` per country, per year and pooled.
+
+    Returns a tidy frame with one row per ``(scope, key)``, where ``scope`` is
+    ``'country'``, ``'year'`` or ``'pooled'``.  ``slope``, ``intercept`` and
+    ``r2`` describe the OLS fit of ``y`` on ``log10(x)``.
+    """
+    countries, years, X, Y = to_arrays(df, x, y)
+    return pd.concat([
+        _table('country', countries, X, Y, axis=1),
+        _table('year', years.astype(object), X, Y, axis=0),
+        _table('pooled', ['all'], X.reshape(1, -1), Y.reshape(1, -1), axis=1),
+    ], ignore_index=True)
+
+
+def growth_rates(df, columns=('GDP', 'LEABY')):
+    """Year-over-year growth of ``columns`` for every country and year.
+
+    Rows are ``Country``, ``Year`` and one ``<column>_growth`` per column; a
+    year is NaN when it or the previous year is missing.
+    """
+    countries, years, X, Y = to_arrays(df, *columns)
+    out = {
+        'Country': np.repeat(countries, len(years) - 1),
+        'Year': np.tile(years[1:], len(countries)),
+    }
+    for name, a in zip(columns, (X, Y)):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[name + '_growth'] = (a[:, 1:] / a[:, :-1] - 1.0).ravel()
+    table = pd.DataFrame(out)
+    growth = [name + '_growth' for name in columns]
+    return table.dropna(subset=growth, how='all').reset_index(drop=True)
@@ -0,0 +1,197 @@
+"""Benchmark the load -> prep -> plot pipeline on synthetic panels.
+
+Generates panels with the ``all_data.csv`` schema at several sizes, runs the
+steps of ``life_expectancy_gdp.py`` on each one and records wall time and
+peak traced memory per stage.  Results are written as JSON so runs of
+different versions can be compared:
+
+    python bench.py --countries 6 200 10000 --years 16 200 --out bench.json
+
+Charts of panels with more than ``--chart-countries`` countries are drawn
+from a seeded random sample of that many countries (every year kept), since
+one facet or bar per country at 10k countries measures matplotlib layout
+rather than this code.  Each result records the countries and rows the
+charts were drawn from under ``"charts"``.
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+from matplotlib import pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+import loader
+import render
+
+
+COUNTRIES = (6, 200, 10_000)
+YEARS = (16, 200)
+FIRST_YEAR = 2000
+CHART_COUNTRIES = 200
+SAMPLE_SEED = 0
+
+
+def synthetic_panel(countries, years, seed=0, first_year=FIRST_YEAR):
+    """A long DataFrame shaped like ``all_data.csv`` (raw column names)."""
+    rng = np.random.default_rng(seed)
+    names = np.array(['Country {:05d}'.format(i) for i in range(countries)], dtype=object)
+    t = np.arange(years)
+    base_gdp = rng.lognormal(mean=25.0, sigma=1.5, size=(countries, 1))
+    growth = rng.normal(0.03, 0.02, size=(countries, 1))
+    gdp = base_gdp * np.exp(growth * t + rng.normal(0, 0.02, size=(countries, years)))
+    base_life = rng.uniform(45.0, 80.0, size=(countries, 1))
+    life = np.minimum(base_life + rng.uniform(0.0, 0.4, size=(countries, 1)) * t, 90.0)
+    life = life + rng.normal(0, 0.3, size=(countries, years))
+    return pd.DataFrame({
+        'Country': np.repeat(names, years),
+        'Year': np.tile(first_year + t, countries),
+        'Life expectancy at birth (years)': np.round(life.ravel(), 1),
+        'GDP': gdp.ravel(),
+    })
+
+
+class Recorder:
+    """Collects one ``{stage, seconds, peak_bytes}`` record per timed stage."""
+
+    def __init__(self, memory=True, label=''):
+        self.memory = memory
+        self.label = label
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        gc.collect()
+        if self.memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            record = {'stage': name, 'seconds': round(seconds, 6)}
+            if self.memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.stages.append(record)
+            print('{} {:<32} {:9.3f} s'.format(self.label, name, seconds), file=sys.stderr)
+
+
+def chart_sample(df, countries, seed=SAMPLE_SEED):
+    """Rows of ``countries`` countries of ``df`` drawn at random, or all of ``df``."""
+    names = df['Country'].cat.categories
+    if len(names) <= countries:
+        return df
+    rng = np.random.default_rng(seed)
+    return loader.select(df, np.sort(rng.choice(names, countries, replace=False)))
+
+
+def run_case(countries, years, workdir, charts=None, memory=True, chart_countries=CHART_COUNTRIES):
+    """Benchmark one panel size; returns its result record."""
+    path = os.path.join(workdir, 'all_data_{}x{}.csv'.format(countries, years))
+    synthetic_panel(countries, years).to_csv(path, index=False)
+    rec = Recorder(memory, '{}x{}'.format(countries, years))
+
+    with rec.stage('read_csv'):
+        df = pd.read_csv(path)
+    with rec.stage('rename'):
+        df = df.rename(columns={"Life expectancy at birth (years)": "LEABY"})
+    raw_bytes = int(df.memory_usage(deep=True).sum())
+    del df
+
+    with rec.stage('load_data_cold'):
+        df = loader.load_data(path)
+    with rec.stage('load_data_warm'):
+        df = loader.load_data(path)
+    with rec.stage('groupby_inspection'):
+        df.groupby('Country', observed=True).head(1)
+        df.groupby('Year').head(1)
+
+    sample = chart_sample(df, chart_countries)
+    jobs = render.JOBS if charts is None else [render.JOBS_BY_NAME[name] for name in charts]
+    for job in jobs:
+        with rec.stage('chart:' + job.name):
+            fig = job.draw(sample)
+        with rec.stage('savefig:' + job.name):
+            fig.savefig(os.path.join(workdir, job.filename))
+        plt.close(fig)
+
+    return {
+        'countries': countries,
+        'years': years,
+        'rows': len(df),
+        'frame_bytes': {'raw': raw_bytes, 'typed': int(df.memory_usage(deep=True).sum())},
+        'charts': {'countries': len(sample['Country'].cat.categories), 'rows': len(sample),
+                   'sampled': sample is not df, 'seed': SAMPLE_SEED},
+        'stages': rec.stages,
+    }
+
+
+def _commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def metadata():
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'seaborn': sns.__version__,
+    }
+
+
+def run(countries=COUNTRIES, years=YEARS, charts=None, memory=True, chart_countries=CHART_COUNTRIES):
+    matplotlib.use('Agg')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_countries in countries:
+            for n_years in years:
+                results.append(run_case(n_countries, n_years, workdir, charts, memory, chart_countries))
+    return {'meta': metadata(), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--countries', type=int, nargs='+', default=list(COUNTRIES))
+    parser.add_argument('--years', type=int, nargs='+', default=list(YEARS))
+    parser.add_argument('--charts', nargs='*', choices=sorted(render.JOBS_BY_NAME),
+                        help='charts to time (default: all)')
+    parser.add_argument('--chart-countries', type=int, default=CHART_COUNTRIES,
+                        help='countries sampled for the chart stages (default: %(default)s)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip tracemalloc; timings are then free of its overhead')
+    parser.add_argument('--out', default='bench.json')
+    args = parser.parse_args(argv)
+
+    report = run(args.countries, args.years, args.charts, not args.no_memory, args.chart_countries)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    for result in report['results']:
+        total = sum(stage.get('seconds', 0.0) for stage in result['stages'])
+        print('{countries:>6} countries x {years:>3} years: {total:8.2f} s'.format(total=total, **result))
+
+
+if __name__ == '__main__':
+    main()
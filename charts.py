@@ -0,0 +1,334 @@
+"""Chart definitions for the GDP vs life expectancy report.
+
+Each function draws one figure of the report from the prepared ``df`` and
+returns the matplotlib figure; saving and showing are left to the caller.
+Every chart sets its own seaborn style first, so the result does not depend
+on which chart ran before it (the notebook relied on cell order for that).
+
+Charts take the long ``df`` or a ``panel.Panel`` of it; build the panel once
+when drawing several.  Bar charts and the scatter and line facets read the
+panel's Country x Year arrays directly: means and analytic confidence
+intervals come from the panel's ``chartspec.summary()`` and every facet is
+handed row or column views, so no chart groups the long table again.
+Seaborn's bootstrapped intervals are only used when a chart is called with
+``bootstrap=True``.
+
+Category order, tick labels and the power-of-ten unit of large values such
+as GDP come from ``chartspec.chart_spec()``, so any set of countries is
+labelled correctly.
+"""
+
+import math
+
+from matplotlib import pyplot as plt
+from matplotlib.lines import Line2D
+import numpy as np
+import seaborn as sns
+
+import chartspec
+import density
+import indicators
+import instrument
+from panel import as_frame, as_panel
+
+
+# With more countries than this the GDP vs LEABY facets are drawn as rasters.
+DENSITY_COUNTRIES = 20
+
+# Countries on each page of ``country_pages()``.
+PAGE_COUNTRIES = 12
+
+
+def _style(**kwargs):
+    if kwargs:
+        sns.set(**kwargs)
+    else:
+        sns.reset_orig()
+
+
+def _errors(stats, scale=1.0):
+    err = np.vstack([stats['mean'] - stats['ci_low'], stats['ci_high'] - stats['mean']]) / scale
+    if not np.isfinite(err).any():
+        return None
+    return np.nan_to_num(err)
+
+
+def _scaled_frame(df, value, spec):
+    """Long frame of ``df`` with ``value`` in the units of ``spec``."""
+    frame = as_frame(df)
+    if spec.exponent:
+        frame = frame.assign(**{value: frame[value] / spec.scale})
+    return frame
+
+
+def _country_ticks(ax, spec, rotation=0):
+    ax.set_xticks(spec.ticks)
+    ax.set_xticklabels(spec.ticklabels, rotation=rotation)
+
+
+def _mean_bars(ax, df, value, bootstrap):
+    panel = as_panel(df)
+    spec = chartspec.chart_spec(panel, value)
+    if bootstrap:
+        with instrument.stage('seaborn_bootstrap', value=value):
+            sns.barplot(x='Country', y=value, data=_scaled_frame(panel, value, spec), order=spec.countries,
+                        ax=ax)
+        return spec
+    with instrument.stage('aggregate', value=value):
+        stats = chartspec.summary(panel)[value]
+    ax.bar(spec.ticks, stats['mean'] / spec.scale, yerr=_errors(stats, spec.scale))
+    return spec
+
+
+def _grouped_bars(ax, df, value, bootstrap):
+    panel = as_panel(df)
+    spec = chartspec.chart_spec(panel, value)
+    if bootstrap:
+        with instrument.stage('seaborn_bootstrap', value=value):
+            sns.barplot(x="Country", y=value, hue="Year", data=_scaled_frame(panel, value, spec),
+                        order=spec.countries, ax=ax)
+        return spec
+    # One observation per country and year: the cell is the mean, with no interval.
+    table = panel[value] / spec.scale
+    years = panel.years
+    width = 0.8 / len(years)
+    # seaborn's hue rule: the color cycle while it has enough colors, else husl.
+    palette = None if len(years) <= len(sns.color_palette()) else 'husl'
+    colors = sns.color_palette(palette, len(years))
+    for i, year in enumerate(years):
+        ax.bar(spec.ticks - 0.4 + width * (i + 0.5), table[:, i], width, color=colors[i], label=str(year))
+    return spec
+
+
+def _facet_axes(n, col_wrap, height):
+    """A FacetGrid-like grid of ``n`` shared axes; unused cells are hidden."""
+    ncols = max(min(col_wrap, n), 1)
+    nrows = max(math.ceil(n / ncols), 1)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(ncols * height, nrows * height),
+                             sharex=True, sharey=True, squeeze=False)
+    for i, ax in enumerate(axes.flat):
+        if i >= n:
+            ax.set_visible(False)
+        # Label the lowest visible axes of each column, like FacetGrid.
+        elif i + ncols >= n:
+            ax.xaxis.set_tick_params(labelbottom=True)
+    sns.despine(fig)
+    return fig, axes.flat[:n]
+
+
+def _side_legend(fig, handles, title):
+    """Legend right of the facets; the figure is widened to make room for it."""
+    legend = fig.legend(handles=handles, title=title, loc='center right', bbox_to_anchor=(1.0, 0.5),
+                        frameon=False)
+    extra = legend.get_window_extent(fig.canvas.get_renderer()).width / fig.dpi + 0.2
+    width = fig.get_figwidth()
+    fig.set_figwidth(width + extra)
+    fig.subplots_adjust(right=width / (width + extra))
+
+
+def _line_facets(df, value, ylabel, title):
+    panel = as_panel(df)
+    spec = chartspec.chart_spec(panel, value)
+    ylabel = chartspec.unit_label(ylabel, spec)
+    years = panel.years
+    with instrument.stage('facet_map'):
+        fig, axes = _facet_axes(len(panel.countries), col_wrap=3, height=4)
+        line = panel[value] / spec.scale
+        for i, (ax, country) in enumerate(zip(axes, panel.countries)):
+            seen = panel.observed[i]
+            if seen.all():
+                ax.plot(years, line[i])
+            else:
+                ax.plot(years[seen], line[i][seen])
+            ax.set_title(str(country))
+    with instrument.stage('facet_layout'):
+        ncols = axes[0].get_gridspec().ncols
+        for i, ax in enumerate(axes):
+            ax.locator_params(axis='x', nbins=4)
+            if i % ncols == 0:
+                ax.set_ylabel(ylabel)
+            if i + ncols >= len(axes):
+                ax.set_xlabel('Year')
+        fig.suptitle(title, fontsize=16)
+        fig.subplots_adjust(top=0.90)
+    return fig
+
+
+def gdp_bar(df, bootstrap=False):
+    _style()
+    fig, ax = plt.subplots()
+    spec = _mean_bars(ax, df, 'GDP', bootstrap)
+    _country_ticks(ax, spec, rotation=30)
+    ax.set_title("Mean GDP by Country")
+    ax.set_ylabel(chartspec.unit_label("GDP in USD", spec))
+    return fig
+
+
+def life_bar(df, bootstrap=False):
+    _style()
+    fig, ax = plt.subplots()
+    spec = _mean_bars(ax, df, 'LEABY', bootstrap)
+    _country_ticks(ax, spec, rotation=30)
+    ax.set_title("Mean Life Expectancy by Country")
+    ax.set_ylabel("Life Expectancy (Years)")
+    return fig
+
+
+def life_violin(df):
+    _style(style='whitegrid', context='talk')
+    fig, ax = plt.subplots(figsize=(15, 10))
+    spec = chartspec.chart_spec(as_panel(df), 'LEABY')
+    sns.violinplot(data=as_frame(df), x='Country', y='LEABY', order=spec.countries, palette='deep', ax=ax)
+    ax.set_ylabel("Life Expectancy (Years)")
+    _country_ticks(ax, spec)
+    ax.set_xlabel("Country")
+    ax.set_title("Distribution of Life Expectancies per Country")
+    return fig
+
+
+def gdp_year_bar(df, bootstrap=False):
+    _style(style='whitegrid', context='talk')
+    fig, ax = plt.subplots(figsize=(10, 15))
+    spec = _grouped_bars(ax, df, 'GDP', bootstrap)
+    ax.set_ylabel(chartspec.unit_label("GDP in USD", spec))
+    _country_ticks(ax, spec)
+    ax.set_xlabel("")
+    ax.set_title("GDP in each Country over Time")
+    ax.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
+    return fig
+
+
+def life_year_bar(df, bootstrap=False):
+    _style(style='whitegrid', context='talk')
+    fig, ax = plt.subplots(figsize=(10, 15))
+    spec = _grouped_bars(ax, df, 'LEABY', bootstrap)
+    ax.set(ylabel="Life Expectancy at Birth (Years)")
+    _country_ticks(ax, spec)
+    ax.set_xlabel("")
+    ax.set_title("Life Expectancy in each Country over Time")
+    ax.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
+    return fig
+
+
+def gdp_life_year_facet(df, backend='auto', x='GDP', y='LEABY'):
+    """Scatter facets of ``y`` against ``x`` per year.
+
+    ``x`` and ``y`` are any two value columns, e.g. indicators of a
+    ``join.join()`` panel.  ``backend`` is ``'scatter'``, ``'density'`` or
+    ``'auto'``.
+    """
+    _style(style='whitegrid', palette='bright')
+    panel = as_panel(df)
+    title = '{} vs. {} per Year'.format(indicators.title(x), indicators.title(y))
+    if backend == 'auto':
+        backend = 'density' if len(panel.countries) > DENSITY_COUNTRIES else 'scatter'
+    xspec, yspec = chartspec.chart_spec(panel, x), chartspec.chart_spec(panel, y)
+    xlabel, ylabel = chartspec.unit_label(x, xspec), chartspec.unit_label(y, yspec)
+    if backend == 'density':
+        frame = _scaled_frame(_scaled_frame(panel, x, xspec), y, yspec)
+        fig = density.density_facets(frame, x=x, y=y, facet='Year', hue='Country', col_wrap=4, height=2)
+        for ax in fig.axes:
+            if ax.get_xlabel() == x:
+                ax.set_xlabel(xlabel)
+            if ax.get_ylabel() == y:
+                ax.set_ylabel(ylabel)
+        fig.suptitle(title, fontsize=16)
+        fig.subplots_adjust(top=0.90)
+        return fig
+    with instrument.stage('facet_map'):
+        years = panel.years
+        fig, axes = _facet_axes(len(years), col_wrap=4, height=2)
+        colors = np.asarray(sns.color_palette(n_colors=len(panel.countries)))
+        xs, ys = panel[x] / xspec.scale, panel[y] / yspec.scale
+        for j, (ax, year) in enumerate(zip(axes, years)):
+            seen = panel.observed[:, j]
+            ax.scatter(xs[seen, j], ys[seen, j], c=colors[seen], edgecolor='w')
+            ax.set_title(str(year))
+    with instrument.stage('facet_layout'):
+        ncols = axes[0].get_gridspec().ncols
+        for i, ax in enumerate(axes):
+            if i % ncols == 0:
+                ax.set_ylabel(ylabel)
+            if i + ncols >= len(axes):
+                ax.set_xlabel(xlabel)
+        handles = [Line2D([], [], linestyle='', marker='o', markerfacecolor=colors[i], markeredgecolor='w',
+                          label=str(country)) for i, country in enumerate(panel.countries)]
+        _side_legend(fig, handles, 'Country')
+        fig.suptitle(title, fontsize=16)
+        fig.subplots_adjust(top=0.90)
+    return fig
+
+
+def life_country_facet(df):
+    _style(style='whitegrid')
+    return _line_facets(df, 'LEABY', 'Life Expectation', 'Life Expectancy vs. Year per Country')
+
+
+def gdp_country_facet(df):
+    _style(style='whitegrid')
+    return _line_facets(df, 'GDP', 'GDP in USD', 'GDP vs. Year per Country')
+
+
+def country_facet(df, value):
+    """Line facets of any value column ``value`` against year per country."""
+    _style(style='whitegrid')
+    return _line_facets(df, value, indicators.label(value),
+                        '{} vs. Year per Country'.format(indicators.title(value)))
+
+
+def country_pages(df, value, per_page=PAGE_COUNTRIES, col_wrap=3, height=4, ylabel=None, title=None):
+    """Line facets of ``value`` per country, ``per_page`` countries at a time.
+
+    Yields ``(page, countries, fig)`` for every page.  All pages are drawn on
+    the same figure: its axes and lines are created once and each page only
+    replaces the line data, titles and y limits, so save (or copy) the figure
+    before asking for the next page.  The figure is closed when the generator
+    is exhausted or closed.
+    """
+    _style(style='whitegrid')
+    panel = as_panel(df)
+    years = panel.years
+    spec = chartspec.chart_spec(panel, value)
+    ylabel = chartspec.unit_label(ylabel or indicators.label(value), spec)
+    title = title or '{} vs. Year per Country'.format(indicators.title(value))
+    per_page = max(min(per_page, len(panel.countries)), 1)
+    pages = max(math.ceil(len(panel.countries) / per_page), 1)
+    with instrument.stage('facet_map'):
+        fig, axes = _facet_axes(per_page, col_wrap=col_wrap, height=height)
+        lines = [ax.plot([], [])[0] for ax in axes]
+        ncols = axes[0].get_gridspec().ncols
+        for i, ax in enumerate(axes):
+            if len(years):
+                ax.set_xlim(years[0], years[-1])
+            ax.locator_params(axis='x', nbins=4)
+            if i % ncols == 0:
+                ax.set_ylabel(ylabel)
+        heading = fig.suptitle(title, fontsize=16)
+        fig.subplots_adjust(top=0.90)
+    data = panel[value] / spec.scale
+    try:
+        for page in range(pages):
+            start = page * per_page
+            countries = panel.countries[start:start + per_page]
+            with instrument.stage('facet_page', page=page):
+                for i, (ax, line) in enumerate(zip(axes, lines)):
+                    # The last page may be short: label the lowest visible axes.
+                    bottom = i < len(countries) <= i + ncols
+                    ax.xaxis.set_tick_params(labelbottom=bottom)
+                    ax.set_xlabel('Year' if bottom else '')
+                    if i < len(countries):
+                        seen = panel.observed[start + i]
+                        line.set_data(years[seen], data[start + i][seen])
+                        ax.set_title(str(countries[i]))
+                    else:
+                        line.set_data([], [])
+                        ax.set_title('')
+                    ax.set_visible(i < len(countries))
+                    ax.relim()
+                for ax in axes:
+                    ax.autoscale_view(scalex=False)
+                if pages > 1:
+                    heading.set_text('{} ({}/{})'.format(title, page + 1, pages))
+            yield page, list(countries), fig
+    finally:
+        plt.close(fig)
@@ -0,0 +1,244 @@
+"""Chart specs and findings derived from the data.
+
+``summary()`` computes everything the charts and the printed findings need
+about a ``panel.Panel`` in one vectorized pass over its arrays: per country
+and value the count, mean, confidence interval, first and last observation,
+change, minimum and maximum.  It is memoized per panel, so every chart drawn
+from the same panel shares one ``Summary``.
+
+``chart_spec()`` turns a summary into what a chart used to hard-code: the
+category order, the tick labels (``SHORT_NAMES``) and a power-of-ten unit for
+large values such as GDP.  ``Summary.findings()`` writes the report's
+factual sentences (highest and lowest GDP and life expectancy, spread of
+the averages, biggest increase, decrease and year-over-year change) from
+the same numbers.
+
+``summaries()`` summarizes many country subsets in one call.  Per-country
+statistics do not depend on which other countries are selected, so the
+panel is summarized once per distinct year range and each subset only picks
+rows.
+"""
+
+from collections import namedtuple
+import math
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from aggregate import summarize
+import indicators
+
+
+# Tick labels for country names too long for a category axis.
+SHORT_NAMES = {
+    'United States of America': 'USA',
+    'United Kingdom of Great Britain and Northern Ireland': 'UK',
+}
+
+# Values whose largest magnitude reaches 10 ** SCALE_FROM are plotted in
+# units of a power of ten, e.g. GDP in USD x 10^13.
+SCALE_FROM = 4
+
+ChartSpec = namedtuple('ChartSpec', ['countries', 'ticks', 'ticklabels', 'exponent', 'scale'])
+
+_summaries = weakref.WeakKeyDictionary()
+
+
+def short_name(country):
+    """Tick label of ``country``."""
+    return SHORT_NAMES.get(str(country), str(country))
+
+
+def _stats(panel, value):
+    """Per-country statistics of ``value``, one row per country of ``panel``."""
+    index = pd.Index(panel.countries, name='Country')
+    stats = panel.moments(value).reindex(index)
+    # Countries without an observation of ``value`` have count 0 and no mean.
+    stats['count'] = stats['count'].fillna(0).astype(np.int64)
+    stats['m2'] = stats['m2'].fillna(0.0)
+    a = panel[value].astype(np.float64)
+    mask = panel.mask(value)
+    seen = stats['count'].to_numpy() > 0
+    rows = np.arange(len(a))
+    first = np.where(seen, mask.argmax(axis=1), 0)
+    last = np.where(seen, mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1), 0)
+    masked = np.where(mask, a, np.nan)
+    stats['first_year'] = np.where(seen, panel.first_year + first, -1)
+    stats['last_year'] = np.where(seen, panel.first_year + last, -1)
+    stats['first'] = np.where(seen, a[rows, first], np.nan)
+    stats['last'] = np.where(seen, a[rows, last], np.nan)
+    stats['min'] = np.where(seen, np.fmin.reduce(masked, axis=1, initial=np.inf), np.nan)
+    stats['max'] = np.where(seen, np.fmax.reduce(masked, axis=1, initial=-np.inf), np.nan)
+    stats['change'] = stats['last'] - stats['first']
+    stats['range'] = stats['max'] - stats['min']
+    # Largest change between two consecutive observed years, and its first year.
+    step, step_year = np.full(len(a), np.nan), np.full(len(a), -1)
+    if mask.shape[1] > 1:
+        pairs = mask[:, 1:] & mask[:, :-1]
+        diff = np.where(pairs, a[:, 1:] - a[:, :-1], 0.0)
+        at = np.abs(diff).argmax(axis=1)
+        has = pairs.any(axis=1)
+        step = np.where(has, diff[rows, at], np.nan)
+        step_year = np.where(has, panel.first_year + at, -1)
+    stats['step'] = step
+    stats['step_year'] = step_year
+    return summarize(stats)
+
+
+class Summary:
+    """Per-country statistics of every value of a panel."""
+
+    def __init__(self, countries, years, stats):
+        self.countries = list(countries)
+        self.years = list(years)
+        self.stats = stats
+
+    @classmethod
+    def from_panel(cls, panel):
+        return cls(panel.countries, panel.years, {value: _stats(panel, value) for value in panel.values})
+
+    def __getitem__(self, value):
+        return self.stats[value]
+
+    def select(self, countries=None):
+        """Summary of ``countries`` only (unknown ones are ignored), without recomputing."""
+        if countries is None:
+            return self
+        wanted = set(countries)
+        keep = [c for c in self.countries if c in wanted]
+        return type(self)(keep, self.years, {value: stats.loc[keep] for value, stats in self.stats.items()})
+
+    def ranked(self, value, column='mean'):
+        """Countries with data for ``value``, by ``column`` from highest to lowest."""
+        stats = self.stats[value]
+        return list(stats[column][stats['count'] > 0].sort_values(ascending=False, kind='stable').index)
+
+    def findings(self):
+        """Dict of the report's factual sentences, keyed by topic.
+
+        Countries are named by ``short_name()``.  ``<value>_change`` is the
+        biggest increase and ``<value>_decrease`` the biggest decrease; each
+        is left out when no country's value went that way, as is
+        ``<value>_step`` (the biggest change between consecutive years) when
+        no country has two.
+        """
+        out = {
+            'countries': 'The countries represented are: {}.'.format(
+                ', '.join(short_name(c) for c in self.countries)),
+            'years': 'The years represented are: {}.'.format(_span(self.years)),
+        }
+        for value, stats in self.stats.items():
+            title = _lower(indicators.title(value))
+            by_mean = [short_name(c) for c in self.ranked(value)]
+            if not by_mean:
+                continue
+            out[value + '_highest'] = 'The country with the highest {} is {}{}.'.format(
+                title, by_mean[0], _then(by_mean[1:2]))
+            out[value + '_lowest'] = 'The country with the lowest {} is {}{}.'.format(
+                title, by_mean[-1], _then(by_mean[-2:-1] if len(by_mean) > 2 else []))
+            change = stats['change'][stats['count'] > 0]
+            increases, decreases = change[change > 0], change[change < 0]
+            if len(increases):
+                out[value + '_change'] = _change(stats, increases.idxmax(), 'increase', title)
+            if len(decreases):
+                out[value + '_decrease'] = _change(stats, decreases.abs().idxmax(), 'decrease', title)
+            rising = int((change > 0).sum())
+            out[value + '_increases'] = '{} seen an increase in {}.'.format(
+                'All the countries have' if rising == len(change) else
+                'None of the countries has' if not rising else
+                '{} of the {} countries have'.format(rising, len(change)), title)
+            out[value + '_spread'] = 'The average {} ranges from {} in {} to {} in {}.'.format(
+                title, _number(stats['mean'].min()), by_mean[-1], _number(stats['mean'].max()), by_mean[0])
+            steps = stats['step'].dropna()
+            if len(steps):
+                country = steps.abs().idxmax()
+                year = stats.at[country, 'step_year']
+                out[value + '_step'] = '{} has seen the biggest change in {} in one year, {} from {} to {}.'.format(
+                    short_name(country), title, _signed(stats.at[country, 'step']), year, year + 1)
+            least = change.abs().idxmin()
+            out[value + '_least_change'] = '{} has seen the least change in {}.'.format(short_name(least), title)
+            widest = self.ranked(value, 'range')[0]
+            out[value + '_range'] = '{} has the widest range of {}, from {} to {}.'.format(
+                short_name(widest), title, _number(stats.at[widest, 'min']), _number(stats.at[widest, 'max']))
+        return out
+
+
+def _change(stats, country, direction, title):
+    return '{} has seen the biggest {} in {}, from {} in {} to {} in {}.'.format(
+        short_name(country), direction, title,
+        _number(stats.at[country, 'first']), stats.at[country, 'first_year'],
+        _number(stats.at[country, 'last']), stats.at[country, 'last_year'])
+
+
+def _lower(title):
+    # Keep acronyms such as GDP as they are.
+    return title if title.isupper() else title.lower()
+
+
+def _then(rest):
+    return ', followed by {}'.format(rest[0]) if rest else ''
+
+
+def _span(years):
+    if not years:
+        return 'none'
+    return '{}-{}'.format(years[0], years[-1]) if len(years) > 1 else str(years[0])
+
+
+def _signed(x):
+    return ('+' if x >= 0 else '') + _number(x)
+
+
+def _number(x):
+    """``x`` with three significant digits, in scientific notation when large."""
+    if not np.isfinite(x):
+        return 'n/a'
+    return '{:.3g}'.format(x) if abs(x) < 10 ** SCALE_FROM else '{:.2e}'.format(x)
+
+
+def summary(panel):
+    """The ``Summary`` of ``panel``, computed once per panel."""
+    try:
+        return _summaries[panel]
+    except KeyError:
+        result = _summaries[panel] = Summary.from_panel(panel)
+        return result
+
+
+def summaries(panel, subsets):
+    """``Summary`` of each ``(countries, years)`` subset of ``panel``, in order.
+
+    ``None`` keeps every country or year.  The panel is summarized once per
+    distinct span of years; country subsets of it are row selections.
+    """
+    spans = {}
+    out = []
+    for countries, years in subsets:
+        span = (min(years), max(years)) if years else None
+        if span not in spans:
+            spans[span] = summary(panel.select(None, range(span[0], span[1] + 1)) if span else panel)
+        out.append(spans[span].select(countries))
+    return out
+
+
+def exponent(stats):
+    """Power of ten to plot values with the largest magnitude in ``stats`` in, or 0."""
+    largest = np.nanmax(np.abs(stats[['min', 'max']].to_numpy()), initial=0.0)
+    if not np.isfinite(largest) or largest < 10 ** SCALE_FROM:
+        return 0
+    return int(math.floor(math.log10(largest)))
+
+
+def chart_spec(panel, value):
+    """``ChartSpec`` of ``value`` on the categorical country axis of ``panel``."""
+    stats = summary(panel)[value]
+    power = exponent(stats)
+    countries = list(stats.index)
+    return ChartSpec(countries, np.arange(len(countries)), [short_name(c) for c in countries],
+                     power, 10.0 ** power)
+
+
+def unit_label(label, spec):
+    """``label`` with the unit of ``spec`` appended, e.g. ``GDP in USD (x 10^13)``."""
+    return '{} (x 10^{})'.format(label, spec.exponent) if spec.exponent else label
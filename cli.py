@@ -0,0 +1,270 @@
+"""Command line entry point for scheduled report runs.
+
+    python cli.py load [--path all_data.csv]
+    python cli.py stats [--country Chile --country Mexico] [--years 2000 2010] [--json]
+    python cli.py render --chart violin --out figures/
+    python cli.py pages --value GDP --per-page 12 [--pdf] [--index] --out pages/
+    python cli.py serve --port 8000
+
+Only the standard library is imported up front; pandas, matplotlib and
+seaborn are imported by the subcommand that needs them, always with the
+non-interactive Agg backend.  ``stats`` and ``render`` first look up their
+result by ``render.run_signature()`` (computed from file stats alone), so a
+repeated run on unchanged data and code is answered from the stats sidecar or
+the figure cache manifest without importing any of them.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Set before matplotlib can be imported by anything below.
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import loader
+
+
+STATS_SUFFIX = '.stats.json'
+# Runs remembered in the stats sidecar; the oldest are forgotten first.
+STATS_RUNS = 64
+
+
+def stats_path(path):
+    """Sidecar of ``path`` holding the summary stats of recent runs."""
+    head, tail = os.path.split(path)
+    return os.path.join(head, '.' + tail + STATS_SUFFIX)
+
+
+def _signature(args):
+    # Same key material as render.run_signature(), without importing render.
+    countries = sorted(args.country) if args.country else None
+    years = list(range(args.years[0], args.years[1] + 1)) if args.years else None
+    return loader.run_signature(args.path, countries, years), countries, years
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        # A read-only data directory only costs the next run its shortcut.
+        pass
+
+
+def compute_stats(df):
+    """Per-country means and the pooled GDP/LEABY correlation of ``df``."""
+    from aggregate import aggregate
+    from analysis import correlate
+
+    gdp = aggregate(df, 'Country', 'GDP')
+    life = aggregate(df, 'Country', 'LEABY')
+    years = df.groupby('Country', observed=True)['Year'].agg(['min', 'max'])
+    countries = [
+        {'country': str(country), 'rows': int(gdp.at[country, 'count']),
+         'first_year': int(years.at[country, 'min']), 'last_year': int(years.at[country, 'max']),
+         'mean_gdp': float(gdp.at[country, 'mean']), 'mean_leaby': float(life.at[country, 'mean'])}
+        for country in gdp.index
+    ]
+    pooled = correlate(df).query("scope == 'pooled'").iloc[0]
+    return {
+        'rows': len(df),
+        'countries': countries,
+        'pooled': {name: float(pooled[name]) for name in ('n', 'pearson', 'spearman', 'slope', 'r2')},
+    }
+
+
+def _print_stats(stats, out):
+    print('{:<28} {:>5} {:>11} {:>16} {:>10}'.format('Country', 'Rows', 'Years', 'Mean GDP', 'Mean LEABY'),
+          file=out)
+    for row in stats['countries']:
+        years = '{}-{}'.format(row['first_year'], row['last_year'])
+        print('{country:<28} {rows:>5} {years:>11} {mean_gdp:>16.4g} {mean_leaby:>10.2f}'.format(
+            years=years, **row), file=out)
+    pooled = stats['pooled']
+    print('pooled: n={:.0f} pearson={:.3f} spearman={:.3f} log10 slope={:.3f} r2={:.3f}'.format(
+        pooled['n'], pooled['pearson'], pooled['spearman'], pooled['slope'], pooled['r2']), file=out)
+
+
+def cmd_load(args, out):
+    df = loader.load_data(args.path, cache=not args.no_cache)
+    print('{} rows, {} countries, years {}-{}'.format(
+        len(df), df['Country'].nunique(), df['Year'].min(), df['Year'].max()), file=out)
+    return 0
+
+
+def cmd_stats(args, out):
+    run, countries, years = _signature(args)
+    sidecar = stats_path(args.path)
+    cached = _read_json(sidecar) if not args.no_cache else {}
+    stats = cached.get(run)
+    if stats is None:
+        df = loader.select(loader.load_data(args.path, cache=not args.no_cache), countries, years)
+        stats = compute_stats(df)
+        if not args.no_cache:
+            cached.pop(run, None)
+            cached[run] = stats
+            for old in list(cached)[:-STATS_RUNS]:
+                del cached[old]
+            _write_json(sidecar, cached)
+    if args.json:
+        json.dump(stats, out, indent=2)
+        print(file=out)
+    else:
+        _print_stats(stats, out)
+    return 0
+
+
+def resolve_charts(wanted, names):
+    """Map each of ``wanted`` to a chart name in ``names``.
+
+    A name matches exactly, as the last ``_`` part (``violin``) or as a
+    unique substring.  Returns None if any of them does not match.
+    """
+    resolved = []
+    for name in wanted:
+        if name in names:
+            resolved.append(name)
+            continue
+        matches = [n for n in names if n.endswith('_' + name)] or [n for n in names if name in n]
+        if len(matches) != 1:
+            return None
+        resolved.append(matches[0])
+    return resolved
+
+
+def _render_cached(args, run):
+    """Copy every requested chart of ``run`` from the figure cache.
+
+    Returns the written paths, or None when any of them has to be drawn.
+    """
+    from figcache import FigureCache
+
+    if not os.path.isdir(args.cache_dir):
+        return None
+    cache = FigureCache(args.cache_dir)
+    charts = cache.charts()
+    names = resolve_charts(args.chart, charts) if args.chart else charts
+    entries = cache.recall(run)
+    if not names or any(name not in entries for name in names):
+        return None
+    os.makedirs(args.out, exist_ok=True)
+    written = []
+    for name in names:
+        key, filename = entries[name]
+        dest = os.path.join(args.out, filename)
+        if not cache.fetch(key, dest):
+            return None
+        written.append(dest)
+    return written
+
+
+def cmd_render(args, out):
+    run, countries, years = _signature(args)
+    written = None if args.no_cache else _render_cached(args, run)
+    if written is None:
+        import render
+        from figcache import FigureCache
+
+        jobs = None
+        if args.chart:
+            jobs = resolve_charts(args.chart, list(render.JOBS_BY_NAME))
+            if jobs is None:
+                print('unknown or ambiguous chart in {}; choose from {}'.format(
+                    args.chart, ', '.join(render.JOBS_BY_NAME)), file=sys.stderr)
+                return 2
+        cache = False if args.no_cache else FigureCache(args.cache_dir)
+        written = render.render_all(out_dir=args.out, jobs=jobs, processes=args.processes,
+                                    path=args.path, cache=cache, countries=countries, years=years)
+        written = list(written.values())
+    for path in written:
+        print(path, file=out)
+    return 0
+
+
+def cmd_pages(args, out):
+    import charts
+    import render
+
+    _, countries, years = _signature(args)
+    df = loader.load_data(args.path, cache=not args.no_cache)
+    per_page = charts.PAGE_COUNTRIES if args.per_page is None else args.per_page
+    for path in render.render_pages(df, args.value, out_dir=args.out, per_page=per_page, pdf=args.pdf,
+                                    index=args.index, countries=countries, years=years):
+        print(path, file=out)
+    return 0
+
+
+def cmd_serve(args, out):
+    import server
+
+    server.main(args.arguments, prog='cli.py serve')
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='GDP vs life expectancy report.')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--path', default=loader.DATA_PATH, help='data file (default: %(default)s)')
+    common.add_argument('--no-cache', action='store_true', help='ignore and do not write any cache')
+    subset = argparse.ArgumentParser(add_help=False)
+    subset.add_argument('--country', action='append', help='restrict to this country (repeatable)')
+    subset.add_argument('--years', type=int, nargs=2, metavar=('FIRST', 'LAST'),
+                        help='restrict to an inclusive range of years')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', parents=[common], help='parse the data and refresh its cache')
+    load.set_defaults(func=cmd_load)
+
+    stats = commands.add_parser('stats', parents=[common, subset], help='per-country summary stats')
+    stats.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    stats.set_defaults(func=cmd_stats)
+
+    render = commands.add_parser('render', parents=[common, subset], help='render report figures')
+    render.add_argument('--chart', action='append',
+                        help='chart to render, e.g. violin or gdp_bar (repeatable; default: all)')
+    render.add_argument('--out', default='.', help='output directory (default: %(default)s)')
+    render.add_argument('--processes', type=int, help='pool size (default: one per CPU)')
+    render.add_argument('--cache-dir', default='.figcache', help='figure cache (default: %(default)s)')
+    render.set_defaults(func=cmd_render)
+
+    pages = commands.add_parser('pages', parents=[common, subset], help='per-country line facets, page by page')
+    pages.add_argument('--value', default='LEABY', help='value to plot (default: %(default)s)')
+    # The default is looked up in cmd_pages(), so building the parser imports no charts.
+    pages.add_argument('--per-page', type=int,
+                       help='countries per page (default: charts.PAGE_COUNTRIES)')
+    pages.add_argument('--pdf', action='store_true', help='write one multi-page PDF instead of PNGs')
+    pages.add_argument('--index', action='store_true', help='also write a JSON index of pages and tiles')
+    pages.add_argument('--out', default='.', help='output directory (default: %(default)s)')
+    pages.set_defaults(func=cmd_pages)
+
+    serve = commands.add_parser('serve', add_help=False, help='serve the charts over HTTP (see serve --help)')
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None, out=sys.stdout):
+    parser = build_parser()
+    # serve's options belong to server.main(), which parses them itself.
+    args, rest = parser.parse_known_args(argv)
+    if args.command == 'serve':
+        args.arguments = rest
+    elif rest:
+        parser.error('unrecognized arguments: ' + ' '.join(rest))
+    if getattr(args, 'years', None) and args.years[0] > args.years[1]:
+        parser.error('--years: FIRST {} is after LAST {}'.format(*args.years))
+    return args.func(args, out)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Content-addressed cache for rendered figures.
+
+A figure's key is the SHA-1 of its chart spec (job name, columns, the source
+of every module next to the one defining its draw function and the plotting
+library versions) and of the hashed DataFrame columns it reads.  On a hit the
+stored image is copied to the output path instead of drawing the chart again.
+Entries are evicted least recently used first once the cache grows past
+``max_bytes``; a hit refreshes the entry's mtime, which is what the eviction
+order is based on.
+
+A small manifest also maps a run signature (``loader.run_signature()``) to
+the keys that run produced, so a later run with the same signature can copy
+its figures out without importing pandas or matplotlib at all.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+
+CACHE_DIR = '.figcache'
+MAX_BYTES = 256 * 1024 * 1024
+MANIFEST = 'manifest.json'
+# Runs remembered in the manifest; the oldest are forgotten first.
+MANIFEST_RUNS = 256
+
+# Source digests by directory, valid while the modules' stats are unchanged.
+_sources = {}
+
+
+def source_fingerprint(directory):
+    """SHA-1 of every Python module in ``directory``.
+
+    Charts draw through helpers in other first-party modules (``chartspec``,
+    ``panel``, ``density``, ``aggregate``...), so all of them are hashed, not
+    just the one defining the draw function.
+    """
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.py'))
+    stats = []
+    for name in names:
+        st = os.stat(os.path.join(directory, name))
+        stats.append((name, st.st_mtime_ns, st.st_size))
+    cached = _sources.get(directory)
+    if cached is not None and cached[0] == stats:
+        return cached[1]
+    digest = hashlib.sha1()
+    for name in names:
+        digest.update(name.encode() + b'\0')
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(f.read())
+    _sources[directory] = (stats, digest.hexdigest())
+    return _sources[directory][1]
+
+
+def spec_fingerprint(job):
+    """Hash everything about ``job`` that changes its output except the data."""
+    import matplotlib
+    import seaborn as sns
+
+    try:
+        directory = os.path.dirname(os.path.abspath(inspect.getsourcefile(job.draw)))
+        source = source_fingerprint(directory) + job.draw.__qualname__
+    except (OSError, TypeError, AttributeError):
+        source = getattr(job.draw, '__qualname__', repr(job.draw))
+    parts = [job.name, os.path.splitext(job.filename)[1], ','.join(job.columns), source,
+             matplotlib.__version__, sns.__version__]
+    return hashlib.sha1('\0'.join(parts).encode()).hexdigest()
+
+
+def frame_fingerprint(df, columns=None):
+    """Hash the values of ``columns`` of ``df`` (all columns by default)."""
+    import pandas as pd
+
+    if columns is not None:
+        df = df[list(columns)]
+    digest = hashlib.sha1(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """Directory of rendered images named by their content key."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, job, df):
+        parts = spec_fingerprint(job) + frame_fingerprint(df, job.columns)
+        return hashlib.sha1(parts.encode()).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key + ext)
+
+    def fetch(self, key, dest):
+        """Copy the entry for ``key`` to ``dest``; returns False on a miss."""
+        path = self._path(key, os.path.splitext(dest)[1])
+        try:
+            shutil.copyfile(path, dest)
+        except FileNotFoundError:
+            return False
+        os.utime(path)
+        return True
+
+    def store(self, key, src):
+        """Add the rendered file ``src`` under ``key`` and enforce the size cap."""
+        path = self._path(key, os.path.splitext(src)[1])
+        tmp = path + '.tmp'
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+        self.evict()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST)
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest.setdefault('charts', [])
+        manifest.setdefault('runs', {})
+        return manifest
+
+    def charts(self):
+        """Names of every chart the last recorded run could render."""
+        return self._read_manifest()['charts']
+
+    def recall(self, run):
+        """``{job name: (key, filename)}`` recorded for ``run``; empty if unknown."""
+        entries = self._read_manifest()['runs'].get(run, {})
+        return {name: tuple(entry) for name, entry in entries.items()}
+
+    def remember(self, run, entries, charts=None):
+        """Record ``{job name: (key, filename)}`` as produced by ``run``.
+
+        ``charts`` is the full list of chart names, kept so callers can
+        resolve names without importing the renderer.
+        """
+        manifest = self._read_manifest()
+        runs = manifest['runs']
+        runs[run] = dict(runs.pop(run, {}), **{name: list(entry) for name, entry in entries.items()})
+        for old in list(runs)[:-MANIFEST_RUNS]:
+            del runs[old]
+        if charts is not None:
+            manifest['charts'] = list(charts)
+        tmp = '{}.{}.tmp'.format(self.manifest_path, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    def evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith('.tmp') and entry.name != MANIFEST:
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
@@ -0,0 +1,135 @@
+"""Registry of the indicators the analysis understands, and country names.
+
+Every indicator has a short column name used throughout the code (``GDP``,
+``LEABY``, ...), a title and axis label for charts, and the World Bank/WHO
+codes and source column headers it is published under.  ``resolve()`` maps
+any of those back to the column name, so files from either source line up
+on the same column.  More indicators can be added with ``register()``.
+
+``Harmonizer`` maps the country names and ISO 3166 alpha-3 codes used by the
+different publishers (``United States``, ``USA``, ``United States of
+America``) to one canonical name, the one ``all_data.csv`` uses.
+"""
+
+from collections import namedtuple
+import re
+import unicodedata
+
+
+Indicator = namedtuple('Indicator', ['name', 'title', 'label', 'codes', 'columns'])
+
+REGISTRY = {}
+_LOOKUP = {}
+
+
+def register(indicator):
+    """Add ``indicator``; its name, codes and source columns must be new."""
+    keys = (indicator.name,) + tuple(indicator.codes) + tuple(indicator.columns)
+    taken = [key for key in keys if key in _LOOKUP]
+    if taken:
+        raise ValueError('already registered: {}'.format(', '.join(taken)))
+    REGISTRY[indicator.name] = indicator
+    for key in keys:
+        _LOOKUP[key] = indicator.name
+    return indicator
+
+
+def resolve(column):
+    """Column name of the indicator published as ``column``, or None."""
+    return _LOOKUP.get(column)
+
+
+def get(name):
+    """The registered ``Indicator`` called ``name``; raises KeyError."""
+    return REGISTRY[name]
+
+
+def title(name):
+    """Chart title of ``name``, or ``name`` itself if it is not registered."""
+    indicator = REGISTRY.get(name)
+    return indicator.title if indicator else name
+
+
+def label(name):
+    """Axis label of ``name``, or ``name`` itself if it is not registered."""
+    indicator = REGISTRY.get(name)
+    return indicator.label if indicator else name
+
+
+register(Indicator('GDP', 'GDP', 'GDP (current US$)', ('NY.GDP.MKTP.CD',), ()))
+register(Indicator('LEABY', 'Life Expectancy', 'Life expectancy at birth (years)',
+                   ('SP.DYN.LE00.IN', 'WHOSIS_000001'), ('Life expectancy at birth (years)',)))
+register(Indicator('GDP_PC', 'GDP per Capita', 'GDP per capita (current US$)', ('NY.GDP.PCAP.CD',), ()))
+register(Indicator('POP', 'Population', 'Population, total', ('SP.POP.TOTL',), ()))
+register(Indicator('HEALTH_PC', 'Health Expenditure per Capita',
+                   'Current health expenditure per capita (current US$)',
+                   ('SH.XPD.CHEX.PC.CD', 'GHED_CHE_pc_US_SHA2011'), ()))
+register(Indicator('HEALTH_GDP', 'Health Expenditure', 'Current health expenditure (% of GDP)',
+                   ('SH.XPD.CHEX.GD.ZS', 'GHED_CHEGDP_SHA2011'), ()))
+
+
+# Other spellings and ISO alpha-3 codes of a canonical country name.  The
+# countries of all_data.csv are listed with their ISO codes; the rest are the
+# names on which the World Bank and WHO exports commonly disagree.
+COUNTRY_ALIASES = {
+    'Chile': ('CHL',),
+    'China': ('CHN', "People's Republic of China"),
+    'Germany': ('DEU', 'Federal Republic of Germany'),
+    'Mexico': ('MEX',),
+    'United States of America': ('USA', 'United States', 'US'),
+    'Zimbabwe': ('ZWE',),
+    'Bahamas': ('BHS', 'Bahamas, The'),
+    'Bolivia (Plurinational State of)': ('BOL', 'Bolivia'),
+    'Czechia': ('CZE', 'Czech Republic'),
+    "Cote d'Ivoire": ('CIV', "Côte d'Ivoire"),
+    'Democratic Republic of the Congo': ('COD', 'Congo, Dem. Rep.'),
+    'Congo': ('COG', 'Congo, Rep.'),
+    'Egypt': ('EGY', 'Egypt, Arab Rep.'),
+    'Gambia': ('GMB', 'Gambia, The'),
+    'Iran (Islamic Republic of)': ('IRN', 'Iran, Islamic Rep.', 'Iran'),
+    'Kyrgyzstan': ('KGZ', 'Kyrgyz Republic'),
+    "Lao People's Democratic Republic": ('LAO', 'Lao PDR', 'Laos'),
+    'Micronesia (Federated States of)': ('FSM', 'Micronesia, Fed. Sts.'),
+    "Democratic People's Republic of Korea": ('PRK', "Korea, Dem. People's Rep.", 'North Korea'),
+    'Republic of Korea': ('KOR', 'Korea, Rep.', 'South Korea'),
+    'Republic of Moldova': ('MDA', 'Moldova'),
+    'Russian Federation': ('RUS', 'Russia'),
+    'Slovakia': ('SVK', 'Slovak Republic'),
+    'Syrian Arab Republic': ('SYR', 'Syria'),
+    'Turkey': ('TUR', 'Turkiye', 'Türkiye'),
+    'United Kingdom of Great Britain and Northern Ireland': ('GBR', 'United Kingdom', 'UK'),
+    'United Republic of Tanzania': ('TZA', 'Tanzania'),
+    'Venezuela (Bolivarian Republic of)': ('VEN', 'Venezuela, RB', 'Venezuela'),
+    'Viet Nam': ('VNM', 'Vietnam'),
+    'Yemen': ('YEM', 'Yemen, Rep.'),
+}
+
+
+def _normalize(name):
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    name = re.sub(r'[^\w\s]', ' ', name.casefold().replace('&', ' and '))
+    name = ' '.join(name.split())
+    return name[4:] if name.startswith('the ') else name
+
+
+class Harmonizer:
+    """Maps country names and ISO codes to canonical names.
+
+    Labels that match neither a canonical name nor an alias after
+    normalization (case, accents, punctuation, a leading "The") are kept as
+    they are, stripped of surrounding whitespace.
+    """
+
+    def __init__(self, aliases=COUNTRY_ALIASES):
+        self.lookup = {}
+        for name, others in aliases.items():
+            for alias in (name,) + tuple(others):
+                self.lookup[_normalize(alias)] = name
+
+    def add(self, alias, name):
+        """Treat ``alias`` (a name or code) as another label of ``name``."""
+        self.lookup[_normalize(alias)] = self.canonical(name)
+
+    def canonical(self, label):
+        label = str(label).strip()
+        return self.lookup.get(_normalize(label), label)
@@ -0,0 +1,135 @@
+"""Chunked ingestion for large indicator files.
+
+``stream()`` reads an ``all_data.csv``-shaped long file, or a wide World
+Bank/WHO export with one column per year, in fixed-size chunks and yields
+long-format ``Country``/``Year``/value frames filtered to the requested
+countries and years.  ``RunningAggregates`` folds those chunks into
+per-country moments as they arrive, so memory is bounded by the chunk size
+and the number of countries rather than by the size of the file.
+"""
+
+import csv
+
+import pandas as pd
+
+from aggregate import combine, moments, summarize
+import indicators
+import instrument
+import loader
+
+
+CHUNKSIZE = 100_000
+
+COUNTRY_COLUMNS = ('Country', 'Country Name')
+
+# World Bank API downloads start with four lines of metadata before the header.
+_WB_PREAMBLE = 4
+
+
+def _sniff(path):
+    """Return ``(skiprows, header)`` for the table in ``path``."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        first = next(reader)
+        if first and first[0] == 'Data Source':
+            for _ in range(_WB_PREAMBLE - 1):
+                next(reader)
+            return _WB_PREAMBLE, next(reader)
+    return 0, first
+
+
+def _year_columns(header, years):
+    columns = [name for name in header if name.strip().isdigit()]
+    if years is not None:
+        columns = [name for name in columns if int(name) in years]
+    return columns
+
+
+def melt_wide(chunk, year_columns, value_name=None):
+    """Melt one chunk of a wide export into ``Country``/``Year``/value frames.
+
+    Yields one frame per indicator in the chunk.  Without ``value_name`` the
+    column is named by ``indicators.resolve()`` or is the indicator code itself.
+    """
+    country = next(name for name in COUNTRY_COLUMNS if name in chunk.columns)
+    if 'Indicator Code' in chunk.columns and value_name is None:
+        groups = chunk.groupby('Indicator Code', sort=False)
+    else:
+        groups = [(value_name or 'value', chunk)]
+    for code, group in groups:
+        name = value_name or indicators.resolve(code) or code
+        long = group.melt(id_vars=[country], value_vars=year_columns,
+                          var_name='Year', value_name=name)
+        long = long.dropna(subset=[name]).rename(columns={country: 'Country'})
+        long['Year'] = long['Year'].astype('int16')
+        yield long
+
+
+def stream(path, countries=None, years=None, chunksize=CHUNKSIZE, value_name=None):
+    """Yield filtered long-format chunks of ``path``.
+
+    ``countries`` is a collection of country names and ``years`` a
+    collection (e.g. a ``range``) of years; ``None`` keeps everything.
+    """
+    skiprows, header = _sniff(path)
+    if countries is not None:
+        countries = set(countries)
+    if 'Year' in header:
+        for chunk in loader.read_csv(path, chunksize=chunksize):
+            if countries is not None:
+                chunk = chunk[chunk['Country'].isin(countries)]
+            if years is not None:
+                chunk = chunk[chunk['Year'].isin(years)]
+            if len(chunk):
+                yield chunk
+        return
+
+    year_columns = _year_columns(header, years)
+    id_columns = [name for name in header
+                  if name in COUNTRY_COLUMNS or name == 'Indicator Code']
+    dtype = dict.fromkeys(year_columns, 'float64')
+    reader = pd.read_csv(path, skiprows=skiprows, usecols=id_columns + year_columns,
+                         dtype=dtype, chunksize=chunksize, encoding='utf-8-sig')
+    for chunk in reader:
+        if countries is not None:
+            country = next(name for name in COUNTRY_COLUMNS if name in chunk.columns)
+            chunk = chunk[chunk[country].isin(countries)]
+        if len(chunk):
+            yield from melt_wide(chunk, year_columns, value_name)
+
+
+class RunningAggregates:
+    """Per-country count/mean/m2 of each value column, updated chunk by chunk."""
+
+    def __init__(self, values=None):
+        self.values = values
+        self.stats = {}
+
+    def update(self, chunk):
+        values = self.values or [name for name in chunk.columns if name not in ('Country', 'Year')]
+        for value in values:
+            if value not in chunk.columns:
+                continue
+            stats = moments(chunk, 'Country', value)
+            # A country whose values are all missing in this chunk adds nothing.
+            stats = stats[stats['count'] > 0]
+            # Chunks carry their own categories; align on plain labels.
+            stats.index = stats.index.astype(str)
+            if value in self.stats:
+                stats = combine(self.stats[value], stats)
+            self.stats[value] = stats
+
+    def result(self, confidence=None):
+        """Return ``{value: summarize(...)}`` for everything seen so far."""
+        kwargs = {} if confidence is None else {'confidence': confidence}
+        return {value: summarize(stats, **kwargs) for value, stats in self.stats.items()}
+
+
+def stream_aggregates(path, countries=None, years=None, chunksize=CHUNKSIZE, values=None):
+    """Per-country aggregates of ``path`` computed in one streaming pass."""
+    running = RunningAggregates(values)
+    with instrument.stage('stream_aggregates', path=path):
+        for chunk in stream(path, countries, years, chunksize):
+            instrument.count('rows', len(chunk))
+            running.update(chunk)
+    return running.result()
@@ -0,0 +1,203 @@
+"""Stage timers, counters and optional profiling for the analysis pipeline.
+
+Wrap a pipeline step in ``stage()``, as a context manager or a decorator::
+
+    with instrument.stage('read_csv', path=path):
+        ...
+        instrument.count('rows', len(df))
+
+Nothing is recorded until ``configure(enabled=True)`` is called (or the
+``INSTRUMENT_TRACE`` environment variable names a trace file).  Each finished
+stage then becomes a Chrome trace event, loadable in chrome://tracing,
+Perfetto or speedscope, and is logged as one JSON line on the ``instrument``
+logger.  With ``profile=True`` every outermost stage is run under cProfile
+and its stats are dumped to ``<profile_dir>/<stage>-<pid>-<n>.prof``; with
+``memory=True`` the peak traced allocation of every stage, above what was
+already allocated when it started, is recorded.
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import tracemalloc
+
+
+logger = logging.getLogger('instrument')
+
+TRACE_ENV = 'INSTRUMENT_TRACE'
+
+_config = {'enabled': False, 'profile': False, 'memory': False, 'profile_dir': '.', 'trace': None}
+_events = []
+_totals = {}
+_local = threading.local()
+_lock = threading.Lock()
+_atexit = []
+
+
+def configure(enabled=True, profile=False, memory=False, profile_dir='.', trace=None):
+    """Turn recording on or off; ``trace`` is a file written at exit."""
+    _config.update(enabled=enabled, profile=profile, memory=memory,
+                   profile_dir=profile_dir, trace=trace)
+    if enabled and memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if trace and not _atexit:
+        atexit.register(_write_at_exit)
+        _atexit.append(True)
+
+
+def config():
+    """Current settings, e.g. to pass on to pool workers."""
+    return dict(_config, trace=None)
+
+
+def enabled():
+    return _config['enabled']
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def count(name, n=1):
+    """Add ``n`` to counter ``name`` of the innermost running stage."""
+    if not _config['enabled']:
+        return
+    stack = _stack()
+    if stack:
+        counters = stack[-1].counters
+        counters[name] = counters.get(name, 0) + n
+    with _lock:
+        _totals[name] = _totals.get(name, 0) + n
+
+
+class stage(contextlib.ContextDecorator):
+    """Time a pipeline step; extra keyword arguments are stored with it."""
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+
+    def _recreate_cm(self):
+        # A fresh instance per decorated call keeps recursion and threads apart.
+        return type(self)(self.name, **self.fields)
+
+    def __enter__(self):
+        if not _config['enabled']:
+            self.active = False
+            return self
+        self.active = True
+        self.counters = {}
+        self.child_peak = 0
+        stack = _stack()
+        self.profiler = None
+        if _config['profile'] and not any(s.profiler for s in stack):
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+        self.base = 0
+        if _config['memory'] and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Keep the enclosing stage's peak so far before resetting it.
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+        stack.append(self)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if not self.active:
+            return False
+        if self.profiler:
+            self.profiler.disable()
+        seconds = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+
+        args = dict(self.fields, **self.counters)
+        if _config['memory'] and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            # Peak allocation above what was already live when the stage began.
+            args['peak_bytes'] = peak - self.base
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        if self.profiler:
+            os.makedirs(_config['profile_dir'], exist_ok=True)
+            filename = '{}-{}-{}.prof'.format(re.sub(r'[^\w.-]', '_', self.name), os.getpid(), len(_events))
+            path = os.path.join(_config['profile_dir'], filename)
+            self.profiler.dump_stats(path)
+            args['profile'] = path
+
+        event = {
+            'name': self.name,
+            'ph': 'X',
+            'ts': round(self.wall * 1e6, 3),
+            'dur': round(seconds * 1e6, 3),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with _lock:
+            _events.append(event)
+        logger.info(json.dumps({'stage': self.name, 'seconds': round(seconds, 6), **args}, default=str))
+        return False
+
+
+def events():
+    with _lock:
+        return list(_events)
+
+
+def totals():
+    with _lock:
+        return dict(_totals)
+
+
+def drain():
+    """Return and clear recorded events and counter totals.
+
+    Pool workers return this to the parent, which passes it to ``merge()``.
+    """
+    with _lock:
+        drained = {'events': list(_events), 'totals': dict(_totals)}
+        _events.clear()
+        _totals.clear()
+    return drained
+
+
+def merge(drained):
+    """Add what another process returned from ``drain()``."""
+    with _lock:
+        _events.extend(drained['events'])
+        for name, n in drained['totals'].items():
+            _totals[name] = _totals.get(name, 0) + n
+
+
+def write_trace(path):
+    """Write every recorded event as a Chrome trace JSON file."""
+    with _lock:
+        trace = {'traceEvents': list(_events), 'displayTimeUnit': 'ms',
+                 'otherData': {'counters': dict(_totals)}}
+    with open(path, 'w') as f:
+        json.dump(trace, f, default=str)
+
+
+def _write_at_exit():
+    if _config['trace']:
+        write_trace(_config['trace'])
+
+
+if os.environ.get(TRACE_ENV):
+    configure(trace=os.environ[TRACE_ENV])
@@ -0,0 +1,104 @@
+"""Align several indicator files on (Country, Year) into one ``Panel``.
+
+``join()`` streams every file through ``ingest.stream()`` (long files like
+``all_data.csv`` or wide World Bank/WHO exports), maps each value column to
+its registered indicator with ``indicators.resolve()`` and each country label
+to its canonical name with an ``indicators.Harmonizer``.  Every chunk is
+reduced at once to three arrays, a country id, a year and a value, keyed on a
+dictionary of canonical names shared by all files; nothing is merged as a
+DataFrame.  Once every file has been read, the key range is known and each
+indicator is scattered straight into its Country x Year panel array, which
+aligns all files in a single pass over each of them.
+
+The result is a ``panel.Panel`` with one array per indicator, so
+``analysis.correlate()`` and the facet charts can take any pair of them from
+memory, and ``panelfile.write()`` can keep it for later runs.
+"""
+
+import numpy as np
+import pandas as pd
+
+import indicators
+import ingest
+import instrument
+from panel import Panel, value_dtype
+
+
+KEY_COLUMNS = ('Year', 'Indicator Code', 'Indicator Name', 'Country Code') + ingest.COUNTRY_COLUMNS
+
+
+def _values(chunk):
+    """Yield ``(column, values)`` for every value column of a long ``chunk``."""
+    if 'Indicator Code' in chunk.columns and 'Value' in chunk.columns:
+        codes, names = pd.factorize(chunk['Indicator Code'])
+        values = chunk['Value'].to_numpy(dtype=np.float64)
+        for i, code in enumerate(names):
+            yield code, np.where(codes == i, values, np.nan)
+        return
+    for column in chunk.columns:
+        if column not in KEY_COLUMNS:
+            yield column, chunk[column].to_numpy(dtype=np.float64)
+
+
+def _country_labels(chunk):
+    for name in ingest.COUNTRY_COLUMNS + ('Country Code',):
+        if name in chunk.columns:
+            return chunk[name]
+    raise ValueError('no country column in {}'.format(list(chunk.columns)))
+
+
+def join(paths, values=None, how='inner', harmonizer=None, years=None, chunksize=ingest.CHUNKSIZE):
+    """Join the indicator files ``paths`` into one panel.
+
+    ``values`` limits the result to these indicator names (default: every
+    column found).  With ``how='inner'`` only countries present in every file
+    are kept, with ``'outer'`` every country is.  Where files overlap on an
+    indicator, country and year, the later file wins.  Columns that are not
+    registered indicators keep their own name.
+    """
+    if how not in ('inner', 'outer'):
+        raise ValueError("how must be 'inner' or 'outer', not {!r}".format(how))
+    harmonizer = harmonizer or indicators.Harmonizer()
+    ids = {}
+    parts = {}
+    per_file = []
+    with instrument.stage('join', files=len(paths)):
+        for path in paths:
+            seen = set()
+            for chunk in ingest.stream(path, years=years, chunksize=chunksize):
+                instrument.count('rows', len(chunk))
+                codes, labels = pd.factorize(_country_labels(chunk))
+                lookup = np.array([ids.setdefault(harmonizer.canonical(label), len(ids)) for label in labels]
+                                  + [-1], dtype=np.int64)
+                country = lookup[codes]
+                year = chunk['Year'].to_numpy().astype(np.int64)
+                for column, data in _values(chunk):
+                    name = indicators.resolve(column) or column
+                    if values is not None and name not in values:
+                        continue
+                    keep = (country >= 0) & ~np.isnan(data)
+                    parts.setdefault(name, []).append((country[keep], year[keep], data[keep]))
+                    seen.update(np.unique(country[keep]).tolist())
+            per_file.append(seen)
+
+        kept = set.intersection(*per_file) if how == 'inner' and per_file else set().union(*per_file)
+        names = {i: name for name, i in ids.items()}
+        countries = sorted((names[i] for i in kept), key=str)
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        rows[[ids[name] for name in countries]] = np.arange(len(countries))
+
+        found = [year for chunks in parts.values() for _, year, _ in chunks if len(year)]
+        first = min(int(year.min()) for year in found) if found else 0
+        last = max(int(year.max()) for year in found) if found else -1
+        shape = (len(countries), last - first + 1)
+        observed = np.zeros(shape, dtype=bool)
+        arrays = {}
+        for name in (values if values is not None else parts):
+            out = np.full(shape, np.nan, dtype=value_dtype(name))
+            for country, year, data in parts.get(name, ()):
+                row = rows[country]
+                keep = row >= 0
+                out[row[keep], year[keep] - first] = data[keep]
+                observed[row[keep], year[keep] - first] = True
+            arrays[name] = out
+    return Panel(countries, first, arrays, observed)
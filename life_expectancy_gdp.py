@@ -32,8 +32,11 @@
 
 
 from matplotlib import pyplot as plt
-import pandas as pd
-import seaborn as sns
+
+import charts
+import chartspec
+from loader import load_data
+from panel import Panel
 
 
 # ## Step 2 Prep The Data
@@ -48,9 +51,29 @@ import seaborn as sns
 # In[3]:
 
 
-df = pd.read_csv('all_data.csv')
+# load_data() parses with explicit dtypes and keeps a Parquet cache next to the CSV.
+df = load_data('all_data.csv')
 print(df.head())
 
+# Country x Year arrays of GDP and LEABY, built once and shared by every chart.
+panel = Panel.from_frame(df)
+
+# The factual answers below are written from one summary pass over the panel,
+# the same one the charts take their labels and units from.
+findings = chartspec.summary(panel).findings()
+
+
+def say(*keys):
+    """Print the findings ``keys`` that hold for this data as one bullet."""
+    sentences = [findings[key] for key in keys if key in findings]
+    if sentences:
+        print('• ' + ' '.join(sentences))
+
+
+# The author's interpretation was written about the original all_data.csv
+# (six countries, 2000-2015) and is labelled as such, whatever the data.
+COMMENTARY = '• Commentary on the original 2000-2015 data: '
+
 
 # ## Step 3 Examine The Data
 
@@ -65,9 +88,9 @@ print(df.head())
 # In[8]:
 
 
-print(df.groupby('Country').head(1))
+print(panel.countries.tolist())
 print('\n')
-print('The countries represented are: Chile, China, Germany, Mexico, USA, Zimbabwe.')
+print(findings['countries'])
 
 
 # What years are represented in the data?
@@ -75,9 +98,9 @@ print('The countries represented are: Chile, China, Germany, Mexico, USA, Zimbab
 # In[9]:
 
 
-print(df.groupby('Year').head(1))
+print(panel.years.tolist())
 print('\n')
-print('The years represented are: 2000-2015.')
+print(findings['years'])
 
 
 # ## Step 4 Tweak The DataFrame
@@ -101,7 +124,8 @@ df.head(1)
 # In[11]:
 
 
-df=df.rename(columns={"Life expectancy at birth (years)": "LEABY"})
+# load_data() already applies this rename while parsing:
+# df=df.rename(columns={"Life expectancy at birth (years)": "LEABY"})
 
 
 # Run `df.head()` again to check your new column name worked.
@@ -124,15 +148,9 @@ df.head(1)
 # In[13]:
 
 
-ax = plt.subplot()
-plt.bar(df['Country'], df['GDP'])
-labels = ['Chile', 'China', 'Germany', 'Mexico', 'USA', 'Zimbabwe']
-ax.set_xticks(range(6))
-ax.set_xticklabels(labels, rotation=30)
-plt.title("GDP by Country")
-plt.ylabel("GDP in USD (x 10^13)")
+fig = charts.gdp_bar(panel)
+fig.savefig("GDP_Country_bar.png")
 plt.show()
-plt.savefig("GDP_Country_bar.png")
 
 
 # B) Create a bar chart using the data in `df` with `Country` on the x-axis and `LEABY` on the y-axis.
@@ -141,15 +159,9 @@ plt.savefig("GDP_Country_bar.png")
 # In[14]:
 
 
-ax = plt.subplot()
-plt.bar(df['Country'], df['LEABY'])
-labels = ['Chile', 'China', 'Germany', 'Mexico', 'USA', 'Zimbabwe']
-ax.set_xticks(range(6))
-ax.set_xticklabels(labels, rotation=30)
-plt.title("Life Expectancy by Country")
-plt.ylabel("Life Expectancy (Years)")
+fig = charts.life_bar(panel)
+fig.savefig("Life_Country_bar.png")
 plt.show()
-plt.savefig("Life_Country_bar.png")
 
 
 # What do you notice about the two bar charts? Do they look similar?
@@ -157,7 +169,8 @@ plt.savefig("Life_Country_bar.png")
 # In[17]:
 
 
-print('• No, the two bar charts do not look similar. The life expectancy is roughly the same for all countries, except for Zimbabwe.')
+say('GDP_spread')
+say('LEABY_spread')
 
 
 # ## Step 6. Violin Plots To Compare Life Expectancy Distributions 
@@ -171,16 +184,8 @@ print('• No, the two bar charts do not look similar. The life expectancy is ro
 # In[24]:
 
 
-fig = plt.subplots(figsize=(15, 10))
-sns.set(style='whitegrid', context='talk')
-sns.violinplot(data=df, x='Country', y='LEABY', palette='deep')
-ax.set_ylabel("Life Expectancy (Years)")
-labels = ['Chile', 'China', 'Germany', 'Mexico', 'USA', 'Zimbabwe']
-ax.set_xticks(range(6))
-ax.set_xticklabels(labels)
-ax.set_xlabel("Country")
-plt.title("Distribution of Life Expectancies per Country")
-plt.savefig("Life_Country_violin.png")
+fig = charts.life_violin(panel)
+fig.savefig("Life_Country_violin.png")
 plt.show()
 
 
@@ -189,7 +194,8 @@ plt.show()
 # In[25]:
 
 
-print('• For distribution, Zimbabwe has a much larger distribution than the other countries. Similarly, the life expectancy of Zimbabwe has changed the most as there is a greater range of life expectancy to make up the average around 46 years.')
+say('LEABY_range')
+say('LEABY_change')
 
 
 # ## Step 7. Bar Plots Of GDP and Life Expectancy over time
@@ -209,19 +215,8 @@ print('• For distribution, Zimbabwe has a much larger distribution than the ot
 # In[28]:
 
 
-f, ax = plt.subplots(figsize=(10, 15))
-sns.set(style='whitegrid', context='talk')
-ax = sns.barplot(x="Country", y="GDP", hue="Year", data=df)
-ax.set_ylabel("GDP in USD x 10^13")
-labels = ['Chile', 'China', 'Germany', 'Mexico', 'USA', 'Zimbabwe']
-ax.set_xticks(range(6))
-ax.set_xticklabels(labels)
-ax.set_xlabel("")
-plt.title("GDP in each Country over Time")
-
-plt.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
-
-plt.savefig("GDP_Country_Year_bar.png")
+fig = charts.gdp_year_bar(panel)
+fig.savefig("GDP_Country_Year_bar.png")
 
 
 # Now that we have plotted a barplot that clusters GDP over time by Country, let's do the same for Life Expectancy.
@@ -234,18 +229,8 @@ plt.savefig("GDP_Country_Year_bar.png")
 # In[30]:
 
 
-f, ax = plt.subplots(figsize=(10, 15)) 
-
-ax = sns.barplot(x="Country", y="LEABY", hue="Year", data=df)
-ax.set(ylabel="Life Expectancy at Birth (Years)")
-labels = ['Chile', 'China', 'Germany', 'Mexico', 'USA', 'Zimbabwe']
-ax.set_xticks(range(6))
-ax.set_xticklabels(labels)
-ax.set_xlabel("")
-plt.title("Life Expectancy in each Country over Time")
-plt.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
-
-plt.savefig("Life_Country_Year_bar.png")
+fig = charts.life_year_bar(panel)
+fig.savefig("Life_Country_Year_bar.png")
 
 
 # What are your first impressions looking at the visualized data?
@@ -260,12 +245,13 @@ plt.savefig("Life_Country_Year_bar.png")
 # In[37]:
 
 
-print('• The life expectancy in Zimbabwe changes the most from roughly 45 in year 2000, to over 65 in year 2015.')
-print('• The biggest changes in GDP data occur between 2004-2009. The biggest changes in life expectancy seem to occur roughly around 2008-2010.')
-print('• The country with the least change in GDP has been Zimbabwe followed by Chile.')
-print('• While all the countries have seen an increase in life expectancy over the 15 year timeline, Zimbabwe has seen the greatest growth in the dataset. Excluding Zimbabe, all the countries are roughly the same life expectancy, ranging from 70 to 82 years.')
-print('• When analyzing the two bar charts, there appears to be no significant relationship between GDP and life expectancy. Countries that have dispropriately large GDPs do not have an average life expectancy disproportiately longer than other countries.')
-print('• Starting with the country Zimbabwe, their GDP is tiny compared to the other world countries. With low GDP, citizens may not have proper access to clean water, sanitary living conditions, modern medicine, and transportation like first world countries. As more countries banded together to help third world countries, particuarly in the years 2004-2009, the life expectancy may have come up with it. Next, looking at countries like Chile and Mexico, while their GDPs are low, they have had relative stable political environments and avoided civil/global wars that often cause turmoil on living conditions and life expectancy. The remaining countries: China, Germany, USA, all have relatively strong GDPs and have seen relatively stable, high average life expectancies.')
+say('LEABY_change')
+say('GDP_step')
+say('LEABY_step')
+say('GDP_least_change')
+say('LEABY_increases', 'LEABY_spread')
+print(COMMENTARY + 'When analyzing the two bar charts, there appears to be no significant relationship between GDP and life expectancy. Countries that have dispropriately large GDPs do not have an average life expectancy disproportiately longer than other countries.')
+print(COMMENTARY + 'Starting with the country Zimbabwe, their GDP is tiny compared to the other world countries. With low GDP, citizens may not have proper access to clean water, sanitary living conditions, modern medicine, and transportation like first world countries. As more countries banded together to help third world countries, particuarly in the years 2004-2009, the life expectancy may have come up with it. Next, looking at countries like Chile and Mexico, while their GDPs are low, they have had relative stable political environments and avoided civil/global wars that often cause turmoil on living conditions and life expectancy. The remaining countries: China, Germany, USA, all have relatively strong GDPs and have seen relatively stable, high average life expectancies.')
 
 
 # Note: You've mapped two bar plots showcasing a variable over time by country, however, bar charts are not traditionally used for this purpose. In fact, a great way to visualize a variable over time is by using a line plot. While the bar charts tell us some information, the data would be better illustrated on a line plot.  We will complete this in steps 9 and 10, for now let's switch gears and create another type of chart.
@@ -303,13 +289,8 @@ print('• Starting with the country Zimbabwe, their GDP is tiny compared to the
 # g = sns.FacetGrid(_____NAME_OF_DATAFRAME_________, col=_______COLUMN_______, hue=________DIFFERENTIATOR________, col_wrap=4, size=2)
 # g = (g.map(______MATPLOTLIB_FUNCTION______, ______X_DATA______, ______Y_DATA______, edgecolor="w").add_legend())
 
-sns.set(style='whitegrid', palette='bright')
-g = sns.FacetGrid(df, col="Year", hue="Country", col_wrap=4, height=2)
-g = (g.map(plt.scatter,"GDP", "LEABY", edgecolor="w").add_legend()).set_titles('{col_name}')
-g.fig.suptitle('GDP vs. Life Expectancy per Year',fontsize=16)
-g.fig.subplots_adjust(top=0.90)
-
-plt.savefig("GDP_Life_Country_Year_facet.png")
+fig = charts.gdp_life_year_facet(panel)
+fig.savefig("GDP_Life_Country_Year_facet.png")
 plt.show()
 
 
@@ -321,9 +302,9 @@ plt.show()
 # In[40]:
 
 
-print('• China has the biggest GDP growth over the dataset years 2000-2015.')
-print('• Zimbabwe has the biggest increase in LEABY over the years.')
-print('• No. This is not surprising. The massive increase in the middle class has created a massive increase in the GDP of China. The lack of increase in GDP in Zimbabwe, but significant increases in LEABY I believe can be hypothesized to be a result of globalization and increasing support from first world countries helping third world countries.')
+say('GDP_change')
+say('LEABY_change')
+print(COMMENTARY + 'No. This is not surprising. The massive increase in the middle class has created a massive increase in the GDP of China. The lack of increase in GDP in Zimbabwe, but significant increases in LEABY I believe can be hypothesized to be a result of globalization and increasing support from first world countries helping third world countries.')
 print('• The scatter plots are not the easiest to read. It is hard to analyze big picture all at once with scatter plots')
 
 
@@ -358,14 +339,8 @@ print('• The scatter plots are not the easiest to read. It is hard to analyze
 # g3 = sns.FacetGrid(df, col="__________", col_wrap=3, size=4)
 # g3 = (g3.map(__plot___, "___x__", "___y___").add_legend())
 
-sns.set(style='whitegrid')
-g2 = sns.FacetGrid(df, col="Country", col_wrap=3, height=4, palette='bright')
-g2 = (g2.map(plt.plot, "Year", "LEABY").add_legend()).set_ylabels('Life Expectation').set_titles('{col_name}')
-plt.locator_params(axis='x', nbins=4)
-g2.fig.suptitle('Life Expectancy vs. Year per Country',fontsize=16)
-g2.fig.subplots_adjust(top=0.90)
-
-plt.savefig("Life_Country_Year_facet.png")
+fig = charts.life_country_facet(panel)
+fig.savefig("Life_Country_Year_facet.png")
 
 
 # What are your first impressions looking at the visualized data?
@@ -378,10 +353,10 @@ plt.savefig("Life_Country_Year_facet.png")
 # In[42]:
 
 
-print('• Zimbabwe and China have seen the largest increases in Life Expectancy, respectively.')
-print('• The years between 2004-2009 saw the greatest changes in life expectancy for Zimbabwe. The other countries increases were not as substantial.')
-print('• The United States saw the least change in life expectancy over time. This can be explained by the country being a developed first world country that has already seen massive increases in life expectancy earlier on in its history. There has been no revolutionary changes in modern medicine or GDP/capita')
-print('• The massive increase in life expectancy for Zimbabwe, and arguably some for Chile, could be explained by the globalization wave that happened in the early 2000s that resulted in support for third world countries and increased supplies/access to modern medicine.')
+say('LEABY_change')
+say('LEABY_step')
+say('LEABY_least_change')
+print(COMMENTARY + 'The massive increase in life expectancy for Zimbabwe, and arguably some for Chile, could be explained by the globalization wave that happened in the early 2000s that resulted in support for third world countries and increased supplies/access to modern medicine.')
 
 
 # ## Step 10. Line Plots for GDP
@@ -394,12 +369,8 @@ print('• The massive increase in life expectancy for Zimbabwe, and arguably so
 # In[43]:
 
 
-g3 = sns.FacetGrid(df, col="Country", col_wrap=3, height=4)
-g3 = (g3.map(plt.plot, "Year", "GDP").add_legend()).set_ylabels('GDP in USD x 10^13').set_titles('{col_name}')
-plt.locator_params(axis='x', nbins=4)
-g3.fig.suptitle('GDP vs. Year per Country',fontsize=16)
-g3.fig.subplots_adjust(top=0.90)
-plt.savefig("GDP_Country_Year_facet.png")
+fig = charts.gdp_country_facet(panel)
+fig.savefig("GDP_Country_Year_facet.png")
 
 
 # Which countries have the highest and lowest GDP?
@@ -407,7 +378,7 @@ plt.savefig("GDP_Country_Year_facet.png")
 # In[44]:
 
 
-print('• The countries with the highest GDP is the United States of America, followed by China. The countries with the lowest GDP is Zimbabwe, followed by Chile.')
+say('GDP_highest', 'GDP_lowest')
 
 
 # Which countries have the highest and lowest life expectancy?
@@ -415,7 +386,7 @@ print('• The countries with the highest GDP is the United States of America, f
 # In[46]:
 
 
-print('• The countries with the highest life expectancy is Chile followed by Germany and the USA. The country with the lowest life expectancy is Zimbabwe.')
+say('LEABY_highest', 'LEABY_lowest')
 
 
 # ## Step 11 Researching Data Context 
@@ -0,0 +1,188 @@
+"""Typed loader for all_data.csv with a Parquet sidecar cache.
+
+The CSV is parsed with explicit dtypes and the long life expectancy column is
+renamed to ``LEABY`` while parsing, so there is no second full-frame copy.
+The parsed frame is written next to the source as a Parquet file keyed on the
+source's mtime, size and SHA-1; warm runs read that file and never touch the
+CSV parser.  Without pyarrow the cache is skipped and the CSV is always parsed.
+
+pandas and pyarrow are imported on first use, so importing this module (e.g.
+for ``source_signature()``) stays cheap.
+"""
+
+import csv
+import hashlib
+import importlib.util
+import json
+import os
+
+import instrument
+
+
+HAVE_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+DATA_PATH = 'all_data.csv'
+
+RENAME = {'Life expectancy at birth (years)': 'LEABY'}
+
+DTYPES = {
+    'Country': 'category',
+    'Year': 'int16',
+    'LEABY': 'float32',
+    'GDP': 'float64',
+}
+
+CACHE_SUFFIX = '.parquet'
+CACHE_VERSION = '1'
+
+_META_KEY = b'all_data_cache'
+
+
+def cache_path(path):
+    """Return the sidecar cache file used for ``path``."""
+    head, tail = os.path.split(path)
+    return os.path.join(head, '.' + tail + CACHE_SUFFIX)
+
+
+def file_hash(path, blocksize=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_signature(path):
+    """Cheap identity of the source file: mtime in ns and size in bytes."""
+    st = os.stat(path)
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+
+# Libraries whose installed version changes what the report produces.
+SIGNATURE_LIBRARIES = ('numpy', 'pandas', 'matplotlib', 'seaborn')
+
+
+def run_signature(path, *extra):
+    """Hash identifying a run of this code on ``path``, from ``os.stat`` alone.
+
+    Covers the source file, every module in this directory, the installed
+    analysis libraries and ``extra`` (e.g. a country subset), so anything
+    derived from them can be reused while the signature is unchanged.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    parts = [os.path.abspath(path), source_signature(path), list(extra)]
+    for name in sorted(os.listdir(here)):
+        if name.endswith('.py'):
+            st = os.stat(os.path.join(here, name))
+            parts.append([name, st.st_mtime_ns, st.st_size])
+    for name in SIGNATURE_LIBRARIES:
+        spec = importlib.util.find_spec(name)
+        if spec is not None and spec.origin:
+            parts.append([name, os.stat(spec.origin).st_mtime_ns])
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+
+def read_csv(path=DATA_PATH, **kwargs):
+    """Parse an all_data.csv-shaped file with the typed schema.
+
+    The header is read first so the rename can be passed to the parser as
+    ``names``; columns outside the schema keep pandas' inferred dtype.
+    """
+    with open(path, newline='') as f:
+        header = next(csv.reader(f))
+    names = [RENAME.get(name, name) for name in header]
+    dtype = {name: DTYPES[name] for name in names if name in DTYPES}
+    import pandas as pd
+
+    with instrument.stage('read_csv', path=path):
+        df = pd.read_csv(path, header=0, names=names, dtype=dtype, **kwargs)
+        if isinstance(df, pd.DataFrame):
+            instrument.count('rows', len(df))
+    return df
+
+
+def _read_cache(path, signature):
+    cached = cache_path(path)
+    if not HAVE_PYARROW or not os.path.exists(cached):
+        return None
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    meta = pq.read_schema(cached).metadata or {}
+    try:
+        key = json.loads(meta[_META_KEY])
+    except (KeyError, ValueError):
+        return None
+    if key.get('version') != CACHE_VERSION:
+        return None
+    if key.get('mtime_ns') == signature['mtime_ns'] and key.get('size') == signature['size']:
+        with instrument.stage('read_parquet', path=cached):
+            return pd.read_parquet(cached)
+    # The file was touched; only re-parse it if the content really changed.
+    if key.get('sha1') != file_hash(path):
+        return None
+    df = pd.read_parquet(cached)
+    key.update(signature)
+    _try_write_cache(path, df, key)
+    return df
+
+
+def _write_cache(path, df, key):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[_META_KEY] = json.dumps(key).encode()
+    table = table.replace_schema_metadata(meta)
+    cached = cache_path(path)
+    tmp = cached + '.tmp'
+    pq.write_table(table, tmp)
+    os.replace(tmp, cached)
+
+
+def _try_write_cache(path, df, key):
+    try:
+        _write_cache(path, df, key)
+    except OSError:
+        # A read-only data directory should not stop the analysis.
+        pass
+
+
+@instrument.stage('load_data')
+def load_data(path=DATA_PATH, cache=True):
+    """Load the prepared DataFrame (``Country``, ``Year``, ``LEABY``, ``GDP``).
+
+    With ``cache=True`` the Parquet sidecar is used when it matches the
+    source and is (re)written when it does not.
+    """
+    if not cache or not HAVE_PYARROW:
+        return read_csv(path)
+    signature = source_signature(path)
+    df = _read_cache(path, signature)
+    if df is not None:
+        return df
+    df = read_csv(path)
+    key = dict(signature, sha1=file_hash(path), version=CACHE_VERSION)
+    _try_write_cache(path, df, key)
+    return df
+
+
+def select(df, countries=None, years=None):
+    """Rows of ``df`` for ``countries`` and ``years`` (``None`` keeps all).
+
+    Unused country categories are dropped so charts only show the subset.
+    """
+    mask = None
+    if countries is not None:
+        mask = df['Country'].isin(list(countries))
+    if years is not None:
+        in_years = df['Year'].isin(list(years))
+        mask = in_years if mask is None else mask & in_years
+    if mask is None:
+        return df
+    df = df[mask].reset_index(drop=True)
+    if df['Country'].dtype == 'category':
+        df['Country'] = df['Country'].cat.remove_unused_categories()
+    return df
@@ -0,0 +1,195 @@
+"""Country x Year panel of the prepared data.
+
+``Panel`` holds every value column (``GDP``, ``LEABY``) as a dense 2-D array
+with one row per country and one column per year, plus an ``observed`` mask
+of the cells that had a row in the long table; every other cell is NaN.  A
+country's row is found through a dict and a year's column by its offset from
+``first_year``, so ``country()`` and ``year()`` are O(1) and return views of
+the arrays, and ``select()`` slices a year range, or a run of consecutive
+countries, without copying.
+
+With ``loader.DTYPES`` the long frame spends 15 bytes on each observation
+(country code, year and both values); the panel spends 13 (both values and
+the mask byte) and no index.
+"""
+
+import numpy as np
+import pandas as pd
+
+import loader
+
+
+KEYS = ('Country', 'Year')
+
+
+def value_dtype(name):
+    """Array dtype of value column ``name``: its ``loader.DTYPES`` float type or float64."""
+    dtype = np.dtype(loader.DTYPES.get(name, 'float64'))
+    return dtype if dtype.kind == 'f' else np.dtype('float64')
+
+
+class Panel:
+    """Dense Country x Year arrays of the value columns of a long frame."""
+
+    def __init__(self, countries, first_year, values, observed):
+        self.countries = np.asarray(countries, dtype=object)
+        self.index = {name: i for i, name in enumerate(self.countries)}
+        self.first_year = int(first_year)
+        self.values = dict(values)
+        self.observed = observed
+        # The long frame, rebuilt on first use by to_frame() for seaborn charts.
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, df, values=None):
+        """Scatter the long ``df`` into a panel in one vectorized pass.
+
+        ``values`` defaults to every column except ``Country`` and ``Year``.
+        Raises ValueError if a ``(Country, Year)`` pair occurs twice.
+        """
+        if values is None:
+            values = [name for name in df.columns if name not in KEYS]
+        codes, countries = pd.factorize(df['Country'], sort=True)
+        year = df['Year'].to_numpy().astype(np.int64)
+        keep = codes >= 0
+        first = int(year[keep].min()) if keep.any() else 0
+        n_years = int(year[keep].max()) - first + 1 if keep.any() else 0
+        shape = (len(countries), n_years)
+
+        flat = codes[keep] * n_years + (year[keep] - first)
+        counts = np.bincount(flat, minlength=shape[0] * shape[1])
+        if counts.size and counts.max() > 1:
+            raise ValueError('duplicate (Country, Year) rows')
+        observed = counts.reshape(shape).astype(bool)
+        arrays = {}
+        for name in values:
+            dtype = value_dtype(name)
+            out = np.full(shape, np.nan, dtype=dtype)
+            out.reshape(-1)[flat] = df[name].to_numpy(dtype=dtype)[keep]
+            arrays[name] = out
+        return cls(np.asarray(countries, dtype=object), first, arrays, observed)
+
+    @property
+    def shape(self):
+        return self.observed.shape
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + self.shape[1])
+
+    @property
+    def observations(self):
+        return int(self.observed.sum())
+
+    @property
+    def nbytes(self):
+        return self.observed.nbytes + sum(a.nbytes for a in self.values.values())
+
+    def __getitem__(self, value):
+        return self.values[value]
+
+    def __contains__(self, value):
+        return value in self.values
+
+    def row(self, country):
+        """Row of ``country``; raises KeyError if it is not in the panel."""
+        return self.index[country]
+
+    def column(self, year):
+        """Column of ``year``; raises KeyError if it is outside the panel."""
+        offset = int(year) - self.first_year
+        if not 0 <= offset < self.shape[1]:
+            raise KeyError(year)
+        return offset
+
+    def country(self, name, value):
+        """View of ``value`` for country ``name`` across all years."""
+        return self.values[value][self.row(name)]
+
+    def year(self, year, value):
+        """View of ``value`` in ``year`` across all countries."""
+        return self.values[value][:, self.column(year)]
+
+    def mask(self, value=None):
+        """Cells with an observation, and a finite ``value`` if one is given."""
+        if value is None:
+            return self.observed
+        return self.observed & np.isfinite(self.values[value])
+
+    def select(self, countries=None, years=None):
+        """Panel restricted to ``countries`` and ``years``.
+
+        ``None`` keeps everything and unknown countries are ignored.  The
+        panel spans the years from the first to the last of ``years``; years
+        of that span not in ``years`` are left unobserved, as in a panel of
+        ``loader.select()`` rows.  The result shares memory with this panel
+        unless ``countries`` picks rows that are not consecutive or ``years``
+        skips some.
+        """
+        if countries is None and years is None:
+            return self
+        rows = slice(None)
+        if countries is not None:
+            picked = np.array(sorted({self.index[c] for c in countries if c in self.index}), dtype=np.intp)
+            if len(picked) and picked[-1] - picked[0] + 1 == len(picked):
+                rows = slice(picked[0], picked[-1] + 1)
+            else:
+                rows = picked
+        columns = slice(None)
+        first = self.first_year
+        skipped = None
+        if years is not None:
+            years = list(years)
+            start = max(min(years) - self.first_year, 0) if years else 0
+            stop = min(max(years) - self.first_year + 1, self.shape[1]) if years else 0
+            columns = slice(start, max(start, stop))
+            first = self.first_year + start
+            skipped = ~np.isin(np.arange(first, self.first_year + columns.stop), years)
+        values = {name: a[rows, columns] for name, a in self.values.items()}
+        observed = self.observed[rows, columns]
+        if skipped is not None and skipped.any():
+            values = {name: a.copy() for name, a in values.items()}
+            for a in values.values():
+                a[:, skipped] = np.nan
+            observed = observed.copy()
+            observed[:, skipped] = False
+        return type(self)(self.countries[rows], first, values, observed)
+
+    def moments(self, value, by='Country'):
+        """``aggregate.moments()`` of ``value`` per country or per year."""
+        axis = 1 if by == 'Country' else 0
+        a = self.values[value].astype(np.float64)
+        mask = self.mask(value)
+        count = mask.sum(axis=axis)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(mask, a, 0.0).sum(axis=axis) / count
+            m2 = np.where(mask, a - np.expand_dims(mean, axis), 0.0)
+        m2 = (m2 * m2).sum(axis=axis)
+        index = pd.Index(self.countries if axis == 1 else self.years, name=by)
+        stats = pd.DataFrame({'count': count, 'mean': mean, 'm2': m2}, index=index)
+        return stats[stats['count'] > 0]
+
+    def to_frame(self):
+        """The long frame of the observed cells, rebuilt once from the arrays."""
+        if self._frame is not None:
+            return self._frame
+        rows, columns = np.nonzero(self.observed)
+        country = pd.Categorical.from_codes(rows, categories=list(self.countries))
+        data = {
+            'Country': country.remove_unused_categories(),
+            'Year': (self.first_year + columns).astype(loader.DTYPES['Year']),
+        }
+        for name, a in self.values.items():
+            data[name] = a[rows, columns]
+        self._frame = pd.DataFrame(data)
+        return self._frame
+
+
+def as_panel(data):
+    """``data`` if it already is a ``Panel``, else ``Panel.from_frame(data)``."""
+    return data if isinstance(data, Panel) else Panel.from_frame(data)
+
+
+def as_frame(data):
+    """The long frame of ``data``, which is a frame or a ``Panel``."""
+    return data.to_frame() if isinstance(data, Panel) else data
@@ -0,0 +1,168 @@
+"""Binary, memory-mappable file format for a ``panel.Panel``.
+
+Layout, all little-endian::
+
+    magic     8 bytes  b'GDPPANEL'
+    version   uint32
+    length    uint32   size of the JSON header that follows
+    header    JSON     countries (the country index, in row order), first_year,
+                       shape, and the dtype and byte offset of every array
+    arrays             the observed mask and one C-ordered Country x Year
+                       array per value, each starting on a 64-byte boundary
+
+``open_panel()`` maps the file read-only with ``numpy.memmap`` and returns a
+``Panel`` whose arrays are views of the mapping, so opening is independent
+of the data size and any number of processes share the same page cache
+pages.  The same layout can be written into any writable buffer
+(``write_into()``) and read back from it (``from_buffer()``), which is how
+``render`` shares a panel through shared memory when there is no file.
+
+``cached_file()`` keeps a ``.<name>.panel`` sidecar next to the CSV that is
+rebuilt whenever the CSV's mtime or size changes.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+import loader
+from panel import Panel
+
+
+MAGIC = b'GDPPANEL'
+VERSION = 1
+SUFFIX = '.panel'
+ALIGN = 64
+
+_PREFIX = struct.Struct('<8sII')
+
+
+def panel_path(path):
+    """Sidecar panel file of ``path``."""
+    head, tail = os.path.split(path)
+    return os.path.join(head, '.' + tail + SUFFIX)
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def layout(panel, source=None):
+    """Return ``(header bytes, [(offset, array)], total size)`` for ``panel``."""
+    arrays = [('observed', panel.observed)] + list(panel.values.items())
+    header = {
+        'countries': [str(c) for c in panel.countries],
+        'first_year': panel.first_year,
+        'shape': list(panel.shape),
+        'arrays': {},
+        'source': source,
+    }
+    # Offsets depend on the header size and the header lists the offsets;
+    # reserve room for them first, then fill them in.
+    for name, a in arrays:
+        header['arrays'][name] = [a.dtype.str, 0]
+    size = _PREFIX.size + len(json.dumps(header).encode()) + 32 * len(arrays)
+    placed = []
+    offset = _align(size)
+    for name, a in arrays:
+        header['arrays'][name][1] = offset
+        placed.append((offset, a))
+        offset = _align(offset + a.nbytes)
+    encoded = json.dumps(header).encode()
+    encoded += b' ' * (size - _PREFIX.size - len(encoded))
+    return _PREFIX.pack(MAGIC, VERSION, len(encoded)) + encoded, placed, max(offset, size)
+
+
+def write_into(panel, buf, source=None):
+    """Write ``panel`` into the writable buffer ``buf``; returns the bytes used."""
+    head, placed, size = layout(panel, source)
+    out = np.frombuffer(buf, dtype=np.uint8, count=size)
+    out[:len(head)] = np.frombuffer(head, dtype=np.uint8)
+    for offset, a in placed:
+        np.ndarray(a.shape, a.dtype, buffer=buf, offset=offset)[...] = a
+    return size
+
+
+def write(panel, dest, source=None):
+    """Write ``panel`` to the file ``dest`` atomically."""
+    head, placed, size = layout(panel, source)
+    tmp = '{}.{}.tmp'.format(dest, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(head)
+        for offset, a in placed:
+            # An empty panel (e.g. a CSV with only a header) has nothing to
+            # write, and a view with a zero in its shape cannot be cast.
+            if a.size:
+                f.seek(offset)
+                f.write(memoryview(np.ascontiguousarray(a)).cast('B'))
+        f.truncate(size)
+    os.replace(tmp, dest)
+
+
+def read_header(buf):
+    """Parse the header at the start of ``buf`` (bytes, mmap or memmap)."""
+    magic, version, length = _PREFIX.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a version {} panel file'.format(VERSION))
+    start = _PREFIX.size
+    return json.loads(bytes(buf[start:start + length]))
+
+
+def from_buffer(buf):
+    """A ``Panel`` whose arrays are views of ``buf``, which must stay alive."""
+    header = read_header(buf)
+    shape = tuple(header['shape'])
+    arrays = {name: np.ndarray(shape, np.dtype(dtype), buffer=buf, offset=offset)
+              for name, (dtype, offset) in header['arrays'].items()}
+    observed = arrays.pop('observed')
+    return Panel(header['countries'], header['first_year'], arrays, observed)
+
+
+def open_panel(path):
+    """Map the panel file ``path`` read-only; returns a ``Panel``."""
+    return from_buffer(np.memmap(path, dtype=np.uint8, mode='r'))
+
+
+def _source_key(path):
+    return dict(loader.source_signature(path), version=VERSION)
+
+
+def _header_of(path):
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(_PREFIX.size)
+            _, _, length = _PREFIX.unpack(head)
+            return read_header(head + f.read(length))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def cached_file(path=loader.DATA_PATH, df=None):
+    """Path of an up-to-date panel file for the CSV ``path``.
+
+    The sidecar is rebuilt, from ``df`` if given, when it is missing or was
+    written for another version of ``path``.  Returns None if it cannot be
+    written (e.g. a read-only data directory).
+    """
+    dest = panel_path(path)
+    key = _source_key(path)
+    header = _header_of(dest)
+    if header is not None and header.get('source') == key:
+        return dest
+    if df is None:
+        df = loader.load_data(path)
+    try:
+        write(Panel.from_frame(df), dest, source=key)
+    except OSError:
+        return None
+    return dest
+
+
+def load_panel(path=loader.DATA_PATH):
+    """Memory-mapped panel of the CSV ``path``, in memory if it cannot be cached."""
+    dest = cached_file(path)
+    if dest is None:
+        return Panel.from_frame(loader.load_data(path))
+    return open_panel(dest)
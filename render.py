@@ -0,0 +1,287 @@
+"""Headless batch renderer for the report figures.
+
+``JOBS`` lists every figure of the report as a declarative ``ChartJob``.
+``render_all()`` forces the Agg backend, copies figures whose data and spec
+are unchanged out of the figure cache and renders the rest on a process
+pool.  Workers share one ``panel.Panel`` of the data: the CSV's
+memory-mapped ``panelfile`` sidecar when rendering from a file, otherwise a
+copy in a shared memory block.  Attaching is a header read in the worker
+initializer, every worker maps the same pages, and tasks only carry the job
+name and subset instead of a pickled frame.
+
+``render_pages()`` writes the per-country line facets page by page for
+data sets with too many countries for one figure.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import io
+import json
+import os
+
+import matplotlib
+
+import charts
+from figcache import FigureCache
+import instrument
+import loader
+from panel import Panel
+import panelfile
+
+
+ChartJob = namedtuple('ChartJob', ['name', 'filename', 'draw', 'columns'])
+
+JOBS = [
+    ChartJob('gdp_bar', 'GDP_Country_bar.png', charts.gdp_bar, ('Country', 'GDP')),
+    ChartJob('life_bar', 'Life_Country_bar.png', charts.life_bar, ('Country', 'LEABY')),
+    ChartJob('life_violin', 'Life_Country_violin.png', charts.life_violin, ('Country', 'LEABY')),
+    ChartJob('gdp_year_bar', 'GDP_Country_Year_bar.png', charts.gdp_year_bar, ('Country', 'Year', 'GDP')),
+    ChartJob('life_year_bar', 'Life_Country_Year_bar.png', charts.life_year_bar, ('Country', 'Year', 'LEABY')),
+    ChartJob('gdp_life_year_facet', 'GDP_Life_Country_Year_facet.png', charts.gdp_life_year_facet,
+             ('Country', 'Year', 'GDP', 'LEABY')),
+    ChartJob('life_country_facet', 'Life_Country_Year_facet.png', charts.life_country_facet,
+             ('Country', 'Year', 'LEABY')),
+    ChartJob('gdp_country_facet', 'GDP_Country_Year_facet.png', charts.gdp_country_facet,
+             ('Country', 'Year', 'GDP')),
+]
+
+JOBS_BY_NAME = {job.name: job for job in JOBS}
+
+# State of a pool worker, set once by _init_worker.
+_worker = {}
+
+
+def share_panel(panel):
+    """Copy ``panel`` into a new shared memory block in ``panelfile`` layout."""
+    _, _, size = panelfile.layout(panel)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    panelfile.write_into(panel, shm.buf)
+    return shm
+
+
+def start_pool(source, processes=None):
+    """Start a process pool whose workers all map the same panel.
+
+    ``source`` is a panel file, which workers memory-map, or a ``Panel``,
+    which is copied once into shared memory.  Either way a worker attaches
+    without copying or parsing anything.  Returns ``(pool, shm)``, ``shm``
+    being None for a file; shut the pool down before ``release(shm)``.
+    """
+    shm = None
+    if isinstance(source, Panel):
+        shm = share_panel(source)
+        source = ('shm', shm.name)
+    else:
+        source = ('file', source)
+    try:
+        pool = ProcessPoolExecutor(processes or os.cpu_count() or 1, initializer=_init_worker,
+                                   initargs=(source, instrument.config()))
+    except BaseException:
+        release(shm)
+        raise
+    return pool, shm
+
+
+def ping():
+    """Do nothing in a pool worker; waiting on it means the workers are up."""
+
+
+def release(shm):
+    """Free the shared memory returned by ``start_pool()``."""
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+
+
+def _init_worker(source, settings):
+    matplotlib.use('Agg')
+    instrument.configure(**settings)
+    # A forked worker starts with the parent's recorded stages and counters;
+    # drop them so only its own go back to the parent.
+    instrument.drain()
+    kind, name = source
+    if kind == 'shm':
+        # The panel's arrays are views of the block, so keep it attached.
+        shm = _worker['shm'] = shared_memory.SharedMemory(name=name)
+        _worker['panel'] = panelfile.from_buffer(shm.buf)
+    else:
+        _worker['panel'] = panelfile.open_panel(name)
+
+
+def _draw(job, df, target, **kwargs):
+    from matplotlib import pyplot as plt
+
+    rows = df.observations if isinstance(df, Panel) else len(df)
+    with instrument.stage('draw:' + job.name, rows=rows):
+        fig = job.draw(df)
+    try:
+        with instrument.stage('savefig:' + job.name):
+            if instrument.enabled():
+                instrument.count('artists', len(fig.findobj()))
+            fig.savefig(target, **kwargs)
+    finally:
+        plt.close(fig)
+
+
+def draw_job(job, df, out_dir):
+    path = os.path.join(out_dir, job.filename)
+    _draw(job, df, path)
+    return path
+
+
+def render_bytes(name, countries=None, years=None, df=None):
+    """Draw chart ``name`` for a subset of ``df`` and return the image bytes.
+
+    ``df`` is a frame or a ``Panel``; in a pool worker it defaults to the
+    worker's panel, which is sliced rather than filtered.  The image format
+    follows the job's filename.
+    """
+    job = JOBS_BY_NAME[name]
+    if df is None:
+        df = _worker['panel']
+    if isinstance(df, Panel):
+        df = df.select(countries, years)
+    else:
+        df = loader.select(df, countries, years)
+    buf = io.BytesIO()
+    _draw(job, df, buf, format=os.path.splitext(job.filename)[1].lstrip('.'))
+    return buf.getvalue()
+
+
+def _run_job(name, out_dir, countries=None, years=None):
+    path = draw_job(JOBS_BY_NAME[name], _worker['panel'].select(countries, years), out_dir)
+    return name, path, instrument.drain()
+
+
+def run_signature(path, countries=None, years=None):
+    """``loader.run_signature()`` of a report on a subset of ``path``."""
+    return loader.run_signature(path, sorted(countries) if countries is not None else None,
+                                sorted(years) if years is not None else None)
+
+
+def render_all(df=None, out_dir='.', jobs=None, processes=None, path=loader.DATA_PATH, cache=True,
+               countries=None, years=None):
+    """Render ``jobs`` (default: every chart in ``JOBS``) into ``out_dir``.
+
+    ``df`` defaults to ``loader.load_data(path)``; ``countries`` and
+    ``years`` restrict it to a subset.  ``cache`` is True for the default
+    ``FigureCache``, False to always redraw, or a ``FigureCache``.  Figures
+    rendered from ``path`` are recorded in the cache manifest under
+    ``run_signature()``.  ``processes`` caps the pool size; with one process,
+    or one chart left to draw, everything runs in-process.  Returns a dict
+    mapping job name to the written file.
+    """
+    matplotlib.use('Agg')
+    run = None
+    if df is None:
+        run = run_signature(path, countries, years)
+        df = loader.load_data(path)
+    full = df
+    df = loader.select(df, countries, years)
+    if jobs is None:
+        jobs = JOBS
+    jobs = [JOBS_BY_NAME[job] if isinstance(job, str) else job for job in jobs]
+    os.makedirs(out_dir, exist_ok=True)
+    if cache is True:
+        cache = FigureCache()
+
+    written = {}
+    keys = {}
+    if cache:
+        for job in jobs:
+            with instrument.stage('figcache:' + job.name):
+                keys[job.name] = cache.key(job, df)
+                dest = os.path.join(out_dir, job.filename)
+                if cache.fetch(keys[job.name], dest):
+                    written[job.name] = dest
+                    instrument.count('cache_hits')
+        jobs = [job for job in jobs if job.name not in written]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(jobs))
+    if processes <= 1 or any(job.name not in JOBS_BY_NAME for job in jobs):
+        # Scatter the frame into a panel once for every chart.
+        panel = Panel.from_frame(df) if jobs else None
+        drawn = {job.name: draw_job(job, panel, out_dir) for job in jobs}
+    else:
+        source, subset = None, (None, None)
+        if run is not None:
+            # Workers map the CSV's panel file and slice the subset themselves.
+            source, subset = panelfile.cached_file(path, full), (countries, years)
+        if source is None:
+            source, subset = Panel.from_frame(df), (None, None)
+        pool, shm = start_pool(source, processes)
+        try:
+            with pool:
+                futures = [pool.submit(_run_job, job.name, out_dir, *subset) for job in jobs]
+                drawn = {}
+                for future in futures:
+                    name, dest, recorded = future.result()
+                    drawn[name] = dest
+                    instrument.merge(recorded)
+        finally:
+            release(shm)
+
+    if cache:
+        for name, dest in drawn.items():
+            cache.store(keys[name], dest)
+    written.update(drawn)
+    if cache and run is not None:
+        cache.remember(run, {name: (keys[name], os.path.basename(dest))
+                             for name, dest in written.items()}, charts=JOBS_BY_NAME)
+    return written
+
+
+def render_pages(df=None, value='LEABY', out_dir='.', stem=None, per_page=charts.PAGE_COUNTRIES, pdf=False,
+                 index=False, path=loader.DATA_PATH, countries=None, years=None):
+    """Write the per-country line facets of ``value`` as pages.
+
+    Countries are split into pages of ``per_page`` facets, all drawn on one
+    reused figure (see ``charts.country_pages()``), and every page is written
+    as soon as it is drawn, so memory does not grow with the number of
+    countries.  Pages are PNGs named ``<stem>_<page>.png``, or with ``pdf``
+    the pages of a single ``<stem>.pdf``.  With ``index`` a ``<stem>.json``
+    lists every page's file and the page and grid cell of every country, for
+    laying the pages out as web tiles.  Returns the written paths.
+    """
+    matplotlib.use('Agg')
+    if df is None:
+        df = loader.load_data(path)
+    if isinstance(df, Panel):
+        df = df.select(countries, years)
+    else:
+        df = Panel.from_frame(loader.select(df, countries, years))
+    stem = stem or '{}_Country_Year_facet'.format(value)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    tiles = {'value': value, 'pages': [], 'countries': {}}
+    document = None
+    if pdf:
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        written.append(os.path.join(out_dir, stem + '.pdf'))
+        document = PdfPages(written[0])
+    try:
+        for page, names, fig in charts.country_pages(df, value, per_page=per_page):
+            ncols = fig.axes[0].get_gridspec().ncols
+            with instrument.stage('savefig:page', page=page):
+                if document is not None:
+                    document.savefig(fig)
+                    filename = os.path.basename(written[0])
+                else:
+                    filename = '{}_{:03d}.png'.format(stem, page + 1)
+                    written.append(os.path.join(out_dir, filename))
+                    fig.savefig(written[-1])
+            tiles['pages'].append({'file': filename, 'page': page + 1, 'countries': [str(c) for c in names]})
+            for i, name in enumerate(names):
+                tiles['countries'][str(name)] = {'page': page + 1, 'row': i // ncols, 'column': i % ncols}
+    finally:
+        if document is not None:
+            document.close()
+    if index:
+        written.append(os.path.join(out_dir, stem + '.json'))
+        with open(written[-1], 'w') as f:
+            json.dump(tiles, f, indent=1)
+    return written
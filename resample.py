@@ -0,0 +1,174 @@
+"""Bootstrap confidence intervals and permutation tests for the GDP vs LEABY
+correlation, per country and pooled.
+
+Each country's valid (GDP, LEABY) pairs are packed to the left of a row of
+the Country x Year arrays and countries with the same number of pairs are
+stacked into one dense block.  Resamples are drawn for a whole block at once,
+as an integer index tensor (bootstrap) or as a matrix of permutations
+(permutation), and the Pearson r of every resample is a reduction along the
+last axis.  Blocks of resamples are spread over a process pool.  Every block
+has its own RNG stream spawned from one ``SeedSequence``, so results depend
+on the seed but not on the number of workers.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import analysis
+
+
+RESAMPLES = 10_000
+CONFIDENCE = 0.95
+SEED = 0
+
+# Upper bound on elements drawn per task (about 64 MB of int64 indices).
+BLOCK_ELEMENTS = 8_000_000
+
+_worker = {}
+
+
+def pack(x, y):
+    """Move each row's jointly valid pairs to the front.
+
+    Returns ``(X, Y, n)`` where row ``i`` holds ``n[i]`` pairs followed by NaN.
+    """
+    mask = np.isfinite(x) & np.isfinite(y)
+    order = np.argsort(~mask, axis=1, kind='stable')
+    X = np.take_along_axis(np.where(mask, x, np.nan), order, axis=1)
+    Y = np.take_along_axis(np.where(mask, y, np.nan), order, axis=1)
+    return X, Y, mask.sum(axis=1)
+
+
+def _standardize(a):
+    """Center and scale rows; r is unchanged and the sums below stay well conditioned."""
+    a = a - a.mean(axis=-1, keepdims=True)
+    scale = a.std(axis=-1, keepdims=True)
+    return a / np.where(scale > 0, scale, 1.0)
+
+
+def _pearson(x, y):
+    n = x.shape[-1]
+    sx = x.sum(axis=-1)
+    sy = y.sum(axis=-1)
+    sxx = np.einsum('...t,...t->...', x, x)
+    syy = np.einsum('...t,...t->...', y, y)
+    sxy = np.einsum('...t,...t->...', x, y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+
+
+def _bootstrap_block(x, y, size, rng):
+    rows, width = x.shape
+    idx = rng.integers(0, width, size=(size, rows, width))
+    idx += (np.arange(rows) * width)[:, None]
+    return _pearson(np.take(x, idx), np.take(y, idx))
+
+
+def _permutation_block(x, y, size, rng):
+    # One permutation per resample is shared by every row of the block; each
+    # row's null distribution is unaffected.  x and y are standardized, so
+    # only the cross term changes under a shuffle.
+    width = x.shape[-1]
+    perms = rng.permuted(np.broadcast_to(np.arange(width), (size, width)), axis=-1)
+    shuffled = np.take(y, perms, axis=1)
+    return np.einsum('rt,rbt->br', x, shuffled) / width
+
+
+_BLOCKS = {'bootstrap': _bootstrap_block, 'permutation': _permutation_block}
+
+
+def _groups(X, Y, n):
+    """Split packed rows into ``(rows, x, y)`` groups of equal pair count."""
+    groups = []
+    for count in np.unique(n):
+        rows = np.flatnonzero(n == count)
+        if count > 1:
+            groups.append((rows, _standardize(X[rows, :count]), _standardize(Y[rows, :count])))
+    return groups
+
+
+def _init_worker(groups):
+    _worker['groups'] = groups
+
+
+def _run_block(kind, group, size, seed):
+    _, x, y = _worker['groups'][group]
+    return _BLOCKS[kind](x, y, size, np.random.default_rng(seed))
+
+
+def resample(X, Y, n, kind, resamples=RESAMPLES, seed=SEED, processes=None):
+    """Pearson r of ``resamples`` resamples of every row; shape (resamples, rows).
+
+    ``X``, ``Y`` and ``n`` come from ``pack()``.  ``kind`` is ``'bootstrap'``
+    or ``'permutation'``; ``seed`` is an int or a ``SeedSequence``.  Rows
+    with fewer than two pairs give NaN.
+    """
+    groups = _groups(X, Y, n)
+    tasks = []
+    for group, (_, x, _) in enumerate(groups):
+        block = max(1, min(resamples, BLOCK_ELEMENTS // x.size))
+        tasks += [(group, start, min(block, resamples - start)) for start in range(0, resamples, block)]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(tasks))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        blocks = [_BLOCKS[kind](groups[group][1], groups[group][2], size, np.random.default_rng(s))
+                  for (group, _, size), s in zip(tasks, seeds)]
+    else:
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(groups,)) as pool:
+            blocks = list(pool.map(_run_block, [kind] * len(tasks), [t[0] for t in tasks],
+                                   [t[2] for t in tasks], seeds))
+
+    out = np.full((resamples, len(n)), np.nan)
+    for (group, start, size), block in zip(tasks, blocks):
+        out[start:start + size, groups[group][0]] = block
+    return out
+
+
+def significance(df, x='GDP', y='LEABY', resamples=RESAMPLES, confidence=CONFIDENCE,
+                 seed=SEED, processes=None):
+    """Bootstrap CI and permutation p-value of the correlation of ``x`` and ``y``.
+
+    Returns one row per country plus a ``'pooled'`` row with the observed
+    Pearson ``r``, the percentile bootstrap interval ``ci_low``/``ci_high``
+    and the two-sided permutation ``p_value``.
+    """
+    countries, _, gx, gy = analysis.to_arrays(df, x, y)
+    X, Y, n = pack(gx, gy)
+    pooled = pack(gx.reshape(1, -1), gy.reshape(1, -1))
+
+    keys = list(countries) + ['pooled']
+    observed = np.concatenate([analysis.pearson(X, Y, axis=1), analysis.pearson(*pooled[:2], axis=1)])
+    seeds = np.random.SeedSequence(seed).spawn(4)
+    boot = np.concatenate([
+        resample(X, Y, n, 'bootstrap', resamples, seeds[0], processes),
+        resample(*pooled, 'bootstrap', resamples, seeds[1], processes),
+    ], axis=1)
+    perm = np.concatenate([
+        resample(X, Y, n, 'permutation', resamples, seeds[2], processes),
+        resample(*pooled, 'permutation', resamples, seeds[3], processes),
+    ], axis=1)
+
+    alpha = (1.0 - confidence) / 2
+    with warnings.catch_warnings():
+        # Rows with fewer than two pairs have no defined r at all.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanquantile(boot, [alpha, 1.0 - alpha], axis=0)
+    extreme = (np.abs(perm) >= np.abs(observed) - 1e-12).sum(axis=0)
+    p_value = np.where(np.isnan(observed), np.nan, (extreme + 1) / (resamples + 1))
+    return pd.DataFrame({
+        'key': keys,
+        'n': np.concatenate([n, pooled[2]]),
+        'r': observed,
+        'ci_low': low,
+        'ci_high': high,
+        'p_value': p_value,
+    })
@@ -0,0 +1,290 @@
+"""Long-running HTTP server for the report charts.
+
+The data is loaded once as a ``panel.Panel`` and stays resident: the CSV's
+memory-mapped ``panelfile`` sidecar is mapped by this process and by every
+worker of the process pool that does the drawing, so a request costs one
+render and no reload or import, and workers add no copy of the data::
+
+    python server.py --path all_data.csv --port 8000
+
+    GET /charts                                    chart names, countries, years
+    GET /chart/life_violin?country=Chile&country=Mexico&years=2000-2010
+    GET /health
+
+``country`` may be repeated or comma separated; ``years`` is ``FIRST-LAST``
+or a single year.  Identical requests that arrive while the chart is being
+drawn wait on the same render, and finished images are kept in a small LRU,
+so a burst of dashboard refreshes costs one render per distinct chart.
+
+Only the standard library's ``asyncio`` is used; the HTTP handling is the
+minimum a dashboard or a reverse proxy needs: ``GET`` with keep-alive.
+"""
+
+import argparse
+import asyncio
+from collections import OrderedDict
+import json
+import logging
+import os
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Set before matplotlib can be imported by anything below.
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import instrument
+import loader
+from panel import Panel
+import panelfile
+import render
+
+
+logger = logging.getLogger('server')
+
+HOST = '127.0.0.1'
+PORT = 8000
+# Finished images kept in memory, least recently used dropped first.
+CACHE_BYTES = 64 * 1024 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+CONTENT_TYPES = {'.png': 'image/png', '.svg': 'image/svg+xml', '.pdf': 'application/pdf'}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """A request the server refuses, with the HTTP status to send."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_years(text):
+    """``'2000-2010'`` -> ``range(2000, 2011)``; ``'2005'`` -> ``range(2005, 2006)``."""
+    first, _, last = text.partition('-')
+    try:
+        first = int(first)
+        last = int(last) if last else first
+    except ValueError:
+        raise RequestError(400, 'years must be FIRST-LAST, got {!r}'.format(text)) from None
+    if last < first:
+        raise RequestError(400, 'empty year range {!r}'.format(text))
+    return range(first, last + 1)
+
+
+class ReportServer:
+    """Resident dataset, render pool and in-flight/finished image tables."""
+
+    def __init__(self, source, processes=None, cache_bytes=CACHE_BYTES):
+        # A panel file or an in-memory Panel, as taken by render.start_pool().
+        self.source = source
+        panel = source if isinstance(source, Panel) else panelfile.open_panel(source)
+        self.countries = frozenset(map(str, panel.countries))
+        self.years = (panel.first_year, panel.first_year + panel.shape[1] - 1)
+        self.processes = processes
+        self.cache_bytes = cache_bytes
+        self.pool = None
+        self.shm = None
+        self.inflight = {}
+        self.images = OrderedDict()
+        self.image_bytes = 0
+
+    def start(self):
+        self.pool, self.shm = render.start_pool(self.source, self.processes)
+        # The pool forks its workers on the first job.  Start them now, before
+        # there is a listening or client socket for them to inherit: a forked
+        # copy of a client socket keeps the connection open after we close it.
+        try:
+            self.pool.submit(render.ping).result()
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            render.release(self.shm)
+            self.pool = None
+
+    def request_key(self, name, query):
+        """Validate a chart request; returns the key its image is shared under."""
+        if name not in render.JOBS_BY_NAME:
+            raise RequestError(404, 'unknown chart {!r}'.format(name))
+        countries = None
+        if 'country' in query:
+            countries = sorted({c for value in query['country'] for c in value.split(',') if c})
+            unknown = [c for c in countries if c not in self.countries]
+            if unknown:
+                raise RequestError(400, 'unknown countries: {}'.format(', '.join(unknown)))
+        years = None
+        if 'years' in query:
+            wanted = parse_years(query['years'][-1])
+            # Clip to the data so equivalent ranges share one key.
+            first, last = max(wanted.start, self.years[0]), min(wanted.stop - 1, self.years[1])
+            if first > last:
+                raise RequestError(404, 'no data for years {}'.format(query['years'][-1]))
+            if (first, last) != self.years:
+                years = (first, last + 1)
+        if countries is not None and len(countries) < len(self.countries):
+            countries = tuple(countries)
+        else:
+            countries = None
+        return name, countries, years
+
+    def _remember(self, key, image):
+        self.images[key] = image
+        self.image_bytes += len(image)
+        while self.image_bytes > self.cache_bytes and len(self.images) > 1:
+            _, old = self.images.popitem(last=False)
+            self.image_bytes -= len(old)
+
+    def _finished(self, key, future):
+        del self.inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self._remember(key, future.result())
+
+    async def chart(self, key):
+        """Image bytes for ``key``, drawing it at most once at a time."""
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+            instrument.count('image_hits')
+            return image
+        future = self.inflight.get(key)
+        if future is None:
+            name, countries, years = key
+            if years is not None:
+                years = range(*years)
+            future = asyncio.get_running_loop().run_in_executor(
+                self.pool, render.render_bytes, name, countries, years)
+            self.inflight[key] = future
+            future.add_done_callback(lambda f: self._finished(key, f))
+            instrument.count('renders')
+        else:
+            instrument.count('coalesced')
+        # A client that goes away must not cancel the render others wait on.
+        return await asyncio.shield(future)
+
+    async def handle(self, method, target):
+        """Answer one request; returns ``(status, content type, body)``."""
+        if method not in ('GET', 'HEAD'):
+            raise RequestError(405, 'only GET is supported')
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip('/')
+        query = parse_qs(url.query)
+        if path == '/health':
+            return 200, 'application/json', json.dumps({'status': 'ok'}).encode()
+        if path == '/charts':
+            body = {'charts': list(render.JOBS_BY_NAME), 'countries': sorted(self.countries),
+                    'years': list(self.years)}
+            return 200, 'application/json', json.dumps(body).encode()
+        if path.startswith('/chart/'):
+            name = os.path.splitext(path[len('/chart/'):])[0]
+            key = self.request_key(name, query)
+            image = await self.chart(key)
+            ext = os.path.splitext(render.JOBS_BY_NAME[name].filename)[1]
+            return 200, CONTENT_TYPES.get(ext, 'application/octet-stream'), image
+        raise RequestError(404, 'no such path {!r}'.format(path))
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 400, 'text/plain', b'request header too large', False)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await _respond(writer, 400, 'text/plain', b'malformed request line', False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                start = time.perf_counter()
+                try:
+                    status, content_type, body = await self.handle(method, target)
+                except RequestError as e:
+                    status, content_type, body = e.status, 'text/plain', str(e).encode()
+                except Exception:
+                    logger.exception('%s %s failed', method, target)
+                    status, content_type, body = 500, 'text/plain', b'render failed'
+                await _respond(writer, status, content_type, body, keep_alive, head_only=method == 'HEAD')
+                logger.info('%s %s %d %d %.1f ms', method, target, status, len(body),
+                            (time.perf_counter() - start) * 1e3)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def _respond(writer, status, content_type, body, keep_alive, head_only=False):
+    head = ('HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n'
+            .format(status, REASONS.get(status, ''), content_type, len(body),
+                    'keep-alive' if keep_alive else 'close'))
+    writer.write(head.encode('latin-1'))
+    if not head_only:
+        writer.write(body)
+    await writer.drain()
+
+
+async def serve(source, host=HOST, port=PORT, processes=None, cache_bytes=CACHE_BYTES, ready=None):
+    """Serve charts of ``source`` (a panel file or a ``Panel``) until cancelled.
+
+    ``ready``, if given, is called with the listening ``asyncio.Server``.
+    """
+    app = ReportServer(source, processes, cache_bytes)
+    app.start()
+    try:
+        server = await asyncio.start_server(app.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+        async with server:
+            if ready is not None:
+                ready(server)
+            await server.serve_forever()
+    finally:
+        app.close()
+
+
+def run(path=loader.DATA_PATH, host=HOST, port=PORT, processes=None, cache_bytes=CACHE_BYTES):
+    """Load ``path`` and serve its charts until interrupted."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    source = panelfile.cached_file(path)
+    if source is None:
+        source = Panel.from_frame(loader.load_data(path))
+
+    def ready(server):
+        for sock in server.sockets:
+            logger.info('serving %s on http://%s:%d', path, *sock.getsockname()[:2])
+
+    try:
+        asyncio.run(serve(source, host, port, processes, cache_bytes, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='Serve the report charts over HTTP.')
+    parser.add_argument('--path', default=loader.DATA_PATH, help='data file (default: %(default)s)')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--processes', type=int, help='render pool size (default: one per CPU)')
+    parser.add_argument('--cache-mb', type=int, default=CACHE_BYTES // (1024 * 1024),
+                        help='memory for finished images (default: %(default)s)')
+    args = parser.parse_args(argv)
+    run(args.path, args.host, args.port, args.processes, args.cache_mb * 1024 * 1024)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import instrument
+
+
+COUNTRIES = ['Chile', 'China', 'Germany', 'Mexico', 'United States of America', 'Zimbabwe']
+YEARS = range(2000, 2016)
+
+
+def write_csv(path, countries=COUNTRIES, years=YEARS):
+    """Write an all_data.csv-shaped file with deterministic values."""
+    lines = ['Country,Year,Life expectancy at birth (years),GDP']
+    for i, country in enumerate(countries):
+        for j, year in enumerate(years):
+            lines.append('{},{},{},{}'.format(country, year, 50.0 + 4 * i + 0.5 * j, (i + 1) * 1e11 + j * 1e9))
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.fixture
+def data_csv(tmp_path):
+    return write_csv(tmp_path / 'all_data.csv')
+
+
+@pytest.fixture
+def recording():
+    """Record stages and counters for one test, starting from nothing."""
+    saved = instrument.config()
+    instrument.configure(enabled=True)
+    instrument.drain()
+    yield
+    instrument.drain()
+    instrument.configure(**saved)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate import aggregate, combine, moments, summarize
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'Country': ['A', 'A', 'A', 'B', 'B', 'C'],
+        'GDP': [1.0, 2.0, 6.0, 10.0, 20.0, 5.0],
+    })
+
+
+def test_aggregate_matches_pandas(df):
+    stats = aggregate(df, 'Country', 'GDP')
+    grouped = df.groupby('Country')['GDP']
+    assert stats['count'].tolist() == [3, 2, 1]
+    assert np.allclose(stats['mean'], grouped.mean())
+    assert np.allclose(stats['std'].iloc[:2], grouped.std().iloc[:2])
+    assert (stats['ci_low'].iloc[:2] < stats['mean'].iloc[:2]).all()
+    # A single observation has no interval.
+    assert np.isnan(stats.loc['C', 'ci_low'])
+
+
+def test_combine_equals_one_pass(df):
+    whole = moments(df, 'Country', 'GDP')
+    merged = combine(moments(df.iloc[:2], 'Country', 'GDP'), moments(df.iloc[2:], 'Country', 'GDP'))
+    assert np.allclose(merged.loc[whole.index, ['count', 'mean', 'm2']], whole[['count', 'mean', 'm2']])
+    assert np.allclose(summarize(merged).loc[whole.index, 'std'].iloc[:2], summarize(whole)['std'].iloc[:2])
+
+
+def test_combine_with_an_empty_side_keeps_the_other():
+    empty = moments(pd.DataFrame({'Country': ['A'], 'GDP': [np.nan]}), 'Country', 'GDP')
+    assert empty.loc['A', 'count'] == 0
+    full = moments(pd.DataFrame({'Country': ['A'] * 5, 'GDP': [70.0, 71.0, 72.0, 73.0, 74.0]}), 'Country', 'GDP')
+    for merged in (combine(empty, full), combine(full, empty)):
+        assert merged.loc['A', 'count'] == 5
+        assert merged.loc['A', 'mean'] == pytest.approx(72.0)
+        assert merged.loc['A', 'm2'] == pytest.approx(10.0)
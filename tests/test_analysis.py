@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(3)
+    rows = pd.DataFrame([(c, y) for c in ['A', 'B', 'C', 'D'] for y in range(2000, 2012)],
+                        columns=['Country', 'Year'])
+    rows['GDP'] = rng.lognormal(25.0, 1.0, len(rows))
+    rows['LEABY'] = np.round(60.0 + 2.0 * np.log10(rows['GDP']) + rng.normal(0.0, 2.0, len(rows)))
+    # Missing cells: a dropped row, a NaN on either side and a country-year gap.
+    rows.loc[[3, 17], 'GDP'] = np.nan
+    rows.loc[[5, 30], 'LEABY'] = np.nan
+    return rows.drop(index=[8, 40]).reset_index(drop=True)
+
+
+def _pandas_corr(df, by, method):
+    return {key: group['GDP'].corr(group['LEABY'], method=method)
+            for key, group in df.groupby(by)}
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+@pytest.mark.parametrize('scope, by', [('country', 'Country'), ('year', 'Year')])
+def test_correlate_matches_pandas(df, method, scope, by):
+    table = analysis.correlate(df)
+    got = table[table['scope'] == scope].set_index('key')[method]
+    expected = _pandas_corr(df, by, method)
+    assert sorted(got.index) == sorted(expected)
+    for key, value in expected.items():
+        assert got[key] == pytest.approx(value)
+
+
+def test_pooled_correlation_and_counts(df):
+    pooled = analysis.correlate(df).set_index('scope').loc['pooled']
+    both = df.dropna(subset=['GDP', 'LEABY'])
+    assert pooled['n'] == len(both)
+    assert pooled['pearson'] == pytest.approx(both['GDP'].corr(both['LEABY']))
+    assert pooled['spearman'] == pytest.approx(both['GDP'].corr(both['LEABY'], method='spearman'))
+
+
+def test_ols_matches_polyfit(df):
+    both = df.dropna(subset=['GDP', 'LEABY'])
+    x, y = np.log10(both['GDP'].to_numpy()), both['LEABY'].to_numpy()
+    n, slope, intercept, r2 = analysis.ols(x, y)
+    expected_slope, expected_intercept = np.polyfit(x, y, 1)
+    assert n == len(x)
+    assert slope == pytest.approx(expected_slope)
+    assert intercept == pytest.approx(expected_intercept)
+    assert r2 == pytest.approx(np.corrcoef(x, y)[0, 1] ** 2)
+
+
+def test_rankdata_averages_ties_and_keeps_nan():
+    a = np.array([[3.0, 1.0, np.nan, 3.0, 2.0, 3.0],
+                  [np.nan, np.nan, 5.0, 5.0, 1.0, 0.0]])
+    ranks = analysis.rankdata(a, axis=1)
+    expected = pd.DataFrame(a).rank(axis=1).to_numpy()
+    assert np.array_equal(ranks, expected, equal_nan=True)
+    assert np.array_equal(analysis.rankdata(a.T, axis=0), expected.T, equal_nan=True)
+
+
+def test_fewer_than_two_pairs_give_nan():
+    x = np.array([[1.0, np.nan, 3.0], [1.0, 2.0, 3.0]])
+    y = np.array([[np.nan, 2.0, 3.0], [2.0, 4.0, 7.0]])
+    assert np.isnan(analysis.pearson(x, y)[0])
+    assert np.isnan(analysis.spearman(x, y)[0])
+    assert analysis.spearman(x, y)[1] == pytest.approx(1.0)
+
+
+def test_growth_rates_match_pct_change(df):
+    growth = analysis.growth_rates(df).set_index(['Country', 'Year'])
+    for value in ('GDP', 'LEABY'):
+        wide = df.pivot(index='Country', columns='Year', values=value)
+        expected = (wide / wide.shift(axis=1) - 1.0).stack().dropna()
+        got = growth[value + '_growth'].dropna()
+        assert sorted(got.index) == sorted(expected.index)
+        assert np.allclose(got.loc[expected.index], expected)
@@ -0,0 +1,91 @@
+import json
+import os
+import re
+
+import numpy as np
+import pytest
+import seaborn as sns
+from matplotlib import pyplot as plt
+
+import charts
+from conftest import COUNTRIES, write_csv
+import loader
+from panel import Panel
+import render
+
+
+def _year_colors(fig):
+    ax = fig.axes[0]
+    _, labels = ax.get_legend_handles_labels()
+    colors = {}
+    for container, label in zip(ax.containers, labels):
+        colors[label] = tuple(np.round(container.patches[0].get_facecolor(), 6))
+    return colors
+
+
+def test_year_bars_have_one_color_per_year(data_csv):
+    panel = Panel.from_frame(loader.load_data(data_csv, cache=False))
+    fig = charts.gdp_year_bar(panel)
+    try:
+        colors = _year_colors(fig)
+    finally:
+        plt.close(fig)
+    assert len(colors) == 16
+    assert len(set(colors.values())) == 16
+
+
+def test_few_years_keep_the_default_colors(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    fig = charts.life_year_bar(Panel.from_frame(loader.select(df, years=range(2000, 2004))))
+    try:
+        colors = list(_year_colors(fig).values())
+    finally:
+        plt.close(fig)
+    default = [tuple(np.round(c + (1.0,), 6)) for c in sns.color_palette(n_colors=4)]
+    assert colors == default
+
+
+@pytest.fixture
+def seven(tmp_path):
+    return Panel.from_frame(loader.load_data(write_csv(tmp_path / 'seven.csv', COUNTRIES + ['Zululand']),
+                                             cache=False))
+
+
+def test_country_pages_split_with_a_short_last_page(seven):
+    seen = []
+    for page, countries, fig in charts.country_pages(seven, 'LEABY', per_page=3):
+        visible = [ax for ax in fig.axes if ax.get_visible()]
+        seen.append((page, countries, [ax.get_title() for ax in visible], fig._suptitle.get_text()))
+        lowest = [ax for ax in visible if ax.get_xlabel() == 'Year']
+        # Every visible column has its lowest axes labelled.
+        assert len(lowest) == min(len(countries), 3)
+    assert [page for page, *_ in seen] == [0, 1, 2]
+    assert [countries for _, countries, *_ in seen] == [COUNTRIES[:3], COUNTRIES[3:6], ['Zululand']]
+    assert seen[2][2] == ['Zululand']
+    assert seen[0][3].endswith('(1/3)')
+
+
+def test_render_pages_writes_pngs_and_a_tile_index(seven, tmp_path):
+    written = render.render_pages(seven, 'GDP', out_dir=str(tmp_path), per_page=4, index=True)
+    names = [os.path.basename(path) for path in written]
+    assert names == ['GDP_Country_Year_facet_001.png', 'GDP_Country_Year_facet_002.png',
+                     'GDP_Country_Year_facet.json']
+    for path in written[:2]:
+        with open(path, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    with open(written[-1]) as f:
+        tiles = json.load(f)
+    assert tiles['value'] == 'GDP'
+    assert [page['countries'] for page in tiles['pages']] == [COUNTRIES[:4], COUNTRIES[4:] + ['Zululand']]
+    assert tiles['countries']['Zululand'] == {'page': 2, 'row': 0, 'column': 2}
+    assert tiles['countries']['Mexico'] == {'page': 1, 'row': 1, 'column': 0}
+
+
+def test_render_pages_as_one_pdf(seven, tmp_path):
+    written = render.render_pages(seven, out_dir=str(tmp_path), stem='life', per_page=3, pdf=True,
+                                  countries=['Chile', 'China', 'Zululand', 'Mexico'])
+    assert [os.path.basename(path) for path in written] == ['life.pdf']
+    with open(written[0], 'rb') as f:
+        document = f.read()
+    assert document.startswith(b'%PDF')
+    assert len(re.findall(rb'/Type\s*/Page\b', document)) == 2
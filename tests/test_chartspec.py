@@ -0,0 +1,48 @@
+import pandas as pd
+
+import chartspec
+from panel import Panel
+
+
+USA = 'United States of America'
+
+
+def _summary(leaby):
+    rows = [{'Country': country, 'Year': year, 'LEABY': value}
+            for country, values in leaby.items() for year, value in zip((2000, 2001), values)]
+    return chartspec.summary(Panel.from_frame(pd.DataFrame(rows)))
+
+
+def test_biggest_decrease_is_the_most_negative_change():
+    findings = _summary({'Chile': [70.0, 69.0], 'Mexico': [70.0, 65.0], USA: [70.0, 72.0]}).findings()
+    assert findings['LEABY_decrease'].startswith('Mexico has seen the biggest decrease')
+    assert findings['LEABY_change'].startswith('USA has seen the biggest increase')
+    assert findings['LEABY_least_change'] == 'Chile has seen the least change in life expectancy.'
+
+
+def test_decrease_is_left_out_when_nothing_decreased():
+    findings = _summary({'Chile': [70.0, 71.0], USA: [70.0, 75.0]}).findings()
+    assert 'LEABY_decrease' not in findings
+    assert 'USA has seen the biggest increase' in findings['LEABY_change']
+
+
+def test_every_sentence_uses_short_names():
+    findings = _summary({'Chile': [60.0, 61.0], USA: [70.0, 80.0]}).findings()
+    assert findings['LEABY_highest'] == 'The country with the highest life expectancy is USA, followed by Chile.'
+    assert findings['LEABY_range'].startswith('USA has the widest range')
+    assert not any(USA in sentence for sentence in findings.values())
+
+
+def test_spread_increases_and_biggest_yearly_step():
+    findings = _summary({'Chile': [70.0, 69.0], 'Mexico': [60.0, 66.0], USA: [80.0, 81.0]}).findings()
+    assert findings['LEABY_increases'] == '2 of the 3 countries have seen an increase in life expectancy.'
+    assert findings['LEABY_spread'] == 'The average life expectancy ranges from 63 in Mexico to 80.5 in USA.'
+    assert findings['LEABY_step'] == ('Mexico has seen the biggest change in life expectancy in one year, '
+                                      '+6 from 2000 to 2001.')
+
+
+def test_step_is_left_out_without_consecutive_years():
+    rows = pd.DataFrame({'Country': ['Chile', 'Chile'], 'Year': [2000, 2002], 'LEABY': [70.0, 72.0]})
+    findings = chartspec.summary(Panel.from_frame(rows)).findings()
+    assert 'LEABY_step' not in findings
+    assert findings['LEABY_increases'] == 'All the countries have seen an increase in life expectancy.'
@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+import charts
+import cli
+import render
+
+
+def test_reversed_year_range_is_rejected(data_csv, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main(['stats', '--path', data_csv, '--years', '2010', '2000'])
+    assert e.value.code == 2
+    assert 'FIRST 2010 is after LAST 2000' in capsys.readouterr().err
+
+
+def test_stats_on_a_year_range(data_csv):
+    out = io.StringIO()
+    assert cli.main(['stats', '--path', data_csv, '--no-cache', '--country', 'Chile',
+                     '--years', '2001', '2003', '--json'], out) == 0
+    assert '"first_year": 2001' in out.getvalue()
+    assert '"last_year": 2003' in out.getvalue()
+
+
+def test_pages_defaults_to_the_chart_page_size(data_csv, monkeypatch):
+    calls = []
+    monkeypatch.setattr(charts, 'PAGE_COUNTRIES', 5)
+    monkeypatch.setattr(render, 'render_pages', lambda *args, **kwargs: calls.append(kwargs) or [])
+    cli.main(['pages', '--path', data_csv, '--no-cache'], io.StringIO())
+    cli.main(['pages', '--path', data_csv, '--no-cache', '--per-page', '2'], io.StringIO())
+    assert [call['per_page'] for call in calls] == [5, 2]
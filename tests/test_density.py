@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import density
+
+
+def _frame(gdp):
+    return pd.DataFrame({'Year': [2000, 2000, 2001], 'Country': ['A', 'B', 'A'],
+                         'GDP': gdp, 'LEABY': [60.0, 61.0, 62.0]})
+
+
+def test_density_facets_draws_one_facet_per_year():
+    fig = density.density_facets(_frame([1e9, 2e9, 3e9]), logx=True)
+    assert len([ax for ax in fig.axes if ax.images]) == 2
+
+
+@pytest.mark.parametrize('gdp, logx', [([np.nan] * 3, False), ([-1.0, 0.0, -2.0], True)])
+def test_empty_selection_raises_a_clear_error(gdp, logx):
+    with pytest.raises(ValueError, match='no rows'):
+        density.density_facets(_frame(gdp), logx=logx)
+
+
+def _six_years(country='United States of America'):
+    years = np.repeat(np.arange(2000, 2006), 2)
+    return pd.DataFrame({'Year': years, 'Country': ['Chile', country] * 6,
+                         'GDP': np.linspace(1e9, 9e9, 12), 'LEABY': np.linspace(60.0, 80.0, 12)})
+
+
+def test_every_column_has_a_labelled_bottom_axis():
+    fig = density.density_facets(_six_years(), col_wrap=4)
+    shown = [ax for ax in fig.axes if ax.get_visible() and ax.images]
+    assert len(shown) == 6
+    bottom = {}
+    for ax in shown:
+        column = ax.get_subplotspec().colspan.start
+        if ax.get_subplotspec().rowspan.start >= bottom.get(column, (-1, None))[0]:
+            bottom[column] = (ax.get_subplotspec().rowspan.start, ax)
+    assert len(bottom) == 4
+    for _, ax in bottom.values():
+        assert ax.get_xlabel() == 'GDP'
+        assert ax.xaxis.get_tick_params()['labelbottom']
+
+
+def test_legend_fits_long_country_names():
+    fig = density.density_facets(_six_years('United Kingdom of Great Britain and Northern Ireland'))
+    renderer = fig.canvas.get_renderer()
+    legend = fig.legends[0].get_window_extent(renderer)
+    assert legend.x1 <= fig.bbox.x1 + 1
+    assert [t.get_text() for t in fig.legends[0].get_texts()][-1].startswith('United Kingdom')
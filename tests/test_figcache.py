@@ -0,0 +1,59 @@
+import importlib.util
+import os
+
+from figcache import FigureCache, spec_fingerprint
+import figcache
+from render import ChartJob
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _job(tmp_path):
+    (tmp_path / 'helper.py').write_text('SCALE = 1\n')
+    (tmp_path / 'drawing.py').write_text('def draw(df):\n    return df\n')
+    module = _load(str(tmp_path / 'drawing.py'), 'drawing')
+    return ChartJob('chart', 'chart.png', module.draw, ('Country',))
+
+
+def test_fingerprint_covers_helper_modules(tmp_path):
+    job = _job(tmp_path)
+    before = spec_fingerprint(job)
+    assert spec_fingerprint(job) == before
+    (tmp_path / 'helper.py').write_text('SCALE = 1000\n')
+    assert spec_fingerprint(job) != before
+
+
+def test_fingerprint_covers_the_repo_chart_helpers(monkeypatch):
+    import charts
+    import chartspec
+
+    seen = []
+    monkeypatch.setattr(figcache, 'source_fingerprint', lambda directory: seen.append(directory) or '')
+    spec_fingerprint(ChartJob('gdp_bar', 'GDP_Country_bar.png', charts.gdp_bar, ()))
+    assert seen == [os.path.dirname(os.path.abspath(chartspec.__file__))]
+
+
+def test_store_fetch_and_evict(tmp_path):
+    cache = FigureCache(str(tmp_path / 'cache'), max_bytes=150)
+    src = tmp_path / 'a.png'
+    for key in ('k1', 'k2'):
+        src.write_bytes(b'x' * 100)
+        cache.store(key, str(src))
+    dest = tmp_path / 'out.png'
+    assert cache.fetch('k2', str(dest))
+    assert dest.read_bytes() == b'x' * 100
+    # Only one 100-byte entry fits; the older one was evicted.
+    assert not cache.fetch('k1', str(dest))
+
+
+def test_manifest_round_trip(tmp_path):
+    cache = FigureCache(str(tmp_path / 'cache'))
+    cache.remember('run', {'gdp_bar': ('key', 'GDP_Country_bar.png')}, charts=['gdp_bar', 'life_bar'])
+    assert cache.recall('run') == {'gdp_bar': ('key', 'GDP_Country_bar.png')}
+    assert cache.recall('other') == {}
+    assert cache.charts() == ['gdp_bar', 'life_bar']
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate import aggregate
+import ingest
+
+
+def test_all_nan_first_chunk_does_not_poison_the_mean():
+    running = ingest.RunningAggregates(['LEABY'])
+    running.update(pd.DataFrame({'Country': ['A', 'A'], 'Year': [2000, 2001], 'LEABY': [np.nan, np.nan]}))
+    running.update(pd.DataFrame({'Country': ['A'] * 5, 'Year': range(2002, 2007),
+                                 'LEABY': [70.0, 71.0, 72.0, 73.0, 74.0]}))
+    stats = running.result()['LEABY']
+    assert stats.loc['A', 'count'] == 5
+    assert stats.loc['A', 'mean'] == pytest.approx(72.0)
+
+
+def test_streaming_matches_a_single_pass(data_csv):
+    import loader
+
+    df = loader.load_data(data_csv, cache=False)
+    streamed = ingest.stream_aggregates(data_csv, chunksize=7)
+    for value in ('GDP', 'LEABY'):
+        whole = aggregate(df, 'Country', value)
+        whole.index = whole.index.astype(str)
+        got = streamed[value].loc[whole.index]
+        assert np.allclose(got['mean'], whole['mean'])
+        assert np.allclose(got['std'], whole['std'])
@@ -0,0 +1,44 @@
+import numpy as np
+
+import indicators
+from join import join
+
+
+def _wide(path, rows):
+    """Write a World Bank style wide export of population for 2000-2002."""
+    lines = ['Country Name,Country Code,Indicator Name,Indicator Code,2000,2001,2002']
+    lines += ['"{}",{},"Population, total",SP.POP.TOTL,{},{},{}'.format(name, code, *values)
+              for name, code, values in rows]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_join_harmonizes_country_names_across_files(data_csv, tmp_path):
+    wide = _wide(tmp_path / 'population.csv', [
+        ('United States', 'USA', (282.0, 285.0, 288.0)),
+        ("People's Republic of China", 'CHN', (1262.0, 1271.0, 1280.0)),
+        ('Chile ', 'CHL', (15.2, 15.4, 15.6)),
+        ('Atlantis', 'ATL', (1.0, 1.0, 1.0)),
+    ])
+    panel = join([data_csv, wide], values=['LEABY', 'POP'])
+    assert list(panel.countries) == ['Chile', 'China', 'United States of America']
+    assert sorted(panel.values) == ['LEABY', 'POP']
+    assert panel.country('United States of America', 'POP')[:3].tolist() == [282.0, 285.0, 288.0]
+    assert np.isnan(panel.country('China', 'POP')[3:]).all()
+    assert panel.country('Chile', 'LEABY')[0] == 50.0
+
+
+def test_outer_join_keeps_countries_of_either_file(data_csv, tmp_path):
+    wide = _wide(tmp_path / 'population.csv', [('Atlantis', 'ATL', (1.0, 2.0, 3.0))])
+    panel = join([data_csv, wide], how='outer')
+    assert 'Atlantis' in panel.countries
+    assert len(panel.countries) == 7
+    assert np.isnan(panel.country('Atlantis', 'GDP')).all()
+
+
+def test_harmonizer_normalizes_case_accents_and_codes():
+    harmonizer = indicators.Harmonizer()
+    assert harmonizer.canonical('the bahamas') == 'Bahamas'
+    assert harmonizer.canonical('Türkiye') == 'Turkey'
+    assert harmonizer.canonical('GBR') == 'United Kingdom of Great Britain and Northern Ireland'
+    assert harmonizer.canonical(' Narnia ') == 'Narnia'
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import loader
+
+
+pytestmark = pytest.mark.skipif(not loader.HAVE_PYARROW, reason='the Parquet cache needs pyarrow')
+
+
+def test_load_data_renames_and_types(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    assert list(df.columns) == ['Country', 'Year', 'LEABY', 'GDP']
+    assert str(df['Country'].dtype) == 'category'
+    assert str(df['Year'].dtype) == 'int16'
+    assert str(df['LEABY'].dtype) == 'float32'
+
+
+def test_cache_is_written_and_reused(data_csv, monkeypatch):
+    first = loader.load_data(data_csv)
+    assert os.path.exists(loader.cache_path(data_csv))
+
+    def fail(*args, **kwargs):
+        raise AssertionError('the CSV was parsed again')
+
+    monkeypatch.setattr(loader, 'read_csv', fail)
+    assert loader.load_data(data_csv).equals(first)
+
+
+def test_cache_is_invalidated_when_the_content_changes(data_csv):
+    loader.load_data(data_csv)
+    with open(data_csv, 'a') as f:
+        f.write('Chile,2016,99.0,1.0\n')
+    df = loader.load_data(data_csv)
+    assert len(df) == 6 * 16 + 1
+    assert df['LEABY'].max() == 99.0
+
+
+def test_touched_but_unchanged_file_keeps_the_cache(data_csv, monkeypatch):
+    loader.load_data(data_csv)
+    st = os.stat(data_csv)
+    os.utime(data_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    monkeypatch.setattr(loader, 'read_csv', lambda *a, **k: pytest.fail('the CSV was parsed again'))
+    assert len(loader.load_data(data_csv)) == 6 * 16
+
+
+def test_select_drops_unused_categories(data_csv):
+    df = loader.select(loader.load_data(data_csv, cache=False), ['Chile', 'Mexico'], range(2005, 2008))
+    assert list(df['Country'].cat.categories) == ['Chile', 'Mexico']
+    assert sorted(df['Year'].unique()) == [2005, 2006, 2007]
@@ -0,0 +1,49 @@
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+import loader
+from panel import Panel
+
+
+def test_from_frame_does_not_keep_the_long_frame(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    ref = weakref.ref(df)
+    panel = Panel.from_frame(df)
+    del df
+    gc.collect()
+    assert ref() is None
+    assert panel.shape == (6, 16)
+
+
+def test_to_frame_rebuilds_the_rows_once(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    panel = Panel.from_frame(df.sample(frac=1.0, random_state=0))
+    frame = panel.to_frame()
+    assert frame is panel.to_frame()
+    assert list(frame.columns) == ['Country', 'Year', 'LEABY', 'GDP']
+    assert len(frame) == len(df)
+    expected = df.sort_values(['Country', 'Year'], ignore_index=True)
+    assert (frame['Country'].astype(str) == expected['Country'].astype(str)).all()
+    assert np.array_equal(frame['Year'], expected['Year'])
+    assert np.array_equal(frame['GDP'], expected['GDP'])
+
+
+def test_duplicate_rows_are_rejected(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    with pytest.raises(ValueError, match='duplicate'):
+        Panel.from_frame(df.iloc[[0, 0]])
+
+
+def test_select_keeps_only_the_given_years(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    panel = Panel.from_frame(df)
+    picked = panel.select(['Chile', 'Mexico'], [2000, 2003, 2015])
+    assert picked.shape == (2, 16)
+    assert picked.observations == len(loader.select(df, ['Chile', 'Mexico'], [2000, 2003, 2015])) == 6
+    assert np.isnan(picked.country('Chile', 'GDP')[1])
+    # The source panel is untouched and a contiguous range is still a view.
+    assert panel.observations == len(df)
+    assert np.shares_memory(panel.select(None, range(2001, 2004))['GDP'], panel['GDP'])
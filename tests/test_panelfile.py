@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import loader
+from panel import Panel
+import panelfile
+
+
+@pytest.fixture
+def panel(data_csv):
+    df = loader.load_data(data_csv, cache=False)
+    return Panel.from_frame(df.drop(index=[3, 40]))
+
+
+def _assert_same(a, b):
+    assert list(a.countries) == list(b.countries)
+    assert a.first_year == b.first_year
+    assert np.array_equal(a.observed, b.observed)
+    assert sorted(a.values) == sorted(b.values)
+    for name in a.values:
+        assert a[name].dtype == b[name].dtype
+        assert np.array_equal(a[name], b[name], equal_nan=True)
+
+
+def test_write_and_open_round_trip(panel, tmp_path):
+    dest = str(tmp_path / 'data.panel')
+    panelfile.write(panel, dest, source={'size': 1})
+    opened = panelfile.open_panel(dest)
+    _assert_same(panel, opened)
+    assert isinstance(opened['GDP'].base, np.memmap)
+    assert panelfile.read_header(np.memmap(dest, dtype=np.uint8, mode='r'))['source'] == {'size': 1}
+
+
+def test_write_into_and_from_buffer_round_trip(panel):
+    _, _, size = panelfile.layout(panel)
+    buf = bytearray(size)
+    assert panelfile.write_into(panel, buf) == size
+    _assert_same(panel, panelfile.from_buffer(buf))
+
+
+def test_empty_panel_round_trip(tmp_path):
+    empty = Panel.from_frame(pd.DataFrame({'Country': pd.Series([], dtype=str),
+                                           'Year': pd.Series([], dtype='int16'),
+                                           'GDP': pd.Series([], dtype='float64')}))
+    dest = str(tmp_path / 'empty.panel')
+    panelfile.write(empty, dest)
+    opened = panelfile.open_panel(dest)
+    assert opened.shape == (0, 0)
+    assert opened.observations == 0
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(ValueError):
+        panelfile.read_header(b'NOTPANEL' + bytes(8))
+
+
+def test_cached_file_is_rebuilt_when_the_csv_changes(data_csv, monkeypatch):
+    dest = panelfile.cached_file(data_csv)
+    assert dest == panelfile.panel_path(data_csv)
+    assert panelfile.open_panel(dest).shape == (6, 16)
+
+    calls = []
+    monkeypatch.setattr(panelfile, 'write', lambda *args, **kwargs: calls.append(args))
+    assert panelfile.cached_file(data_csv) == dest
+    assert calls == []
+    monkeypatch.undo()
+
+    with open(data_csv, 'a') as f:
+        f.write('Narnia,2000,70.0,1e9\n')
+    dest = panelfile.cached_file(data_csv)
+    assert 'Narnia' in list(panelfile.open_panel(dest).countries)
+
+
+def test_cached_file_of_a_header_only_csv(tmp_path):
+    path = tmp_path / 'all_data.csv'
+    path.write_text('Country,Year,Life expectancy at birth (years),GDP\n')
+    dest = panelfile.cached_file(str(path))
+    assert panelfile.open_panel(dest).observations == 0
+
+
+def test_cached_file_returns_none_when_it_cannot_write(data_csv, monkeypatch):
+    def fail(*args, **kwargs):
+        raise PermissionError('read-only')
+
+    monkeypatch.setattr(panelfile, 'write', fail)
+    assert panelfile.cached_file(data_csv) is None
+    assert panelfile.load_panel(data_csv).shape == (6, 16)
+    assert not os.path.exists(panelfile.panel_path(data_csv))
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import instrument
+import loader
+import render
+
+
+def test_workers_do_not_report_the_parents_stages(data_csv, tmp_path, recording):
+    df = loader.load_data(data_csv, cache=False)
+    with instrument.stage('before_pool'):
+        instrument.count('parent_rows', 10)
+    written = render.render_all(df, str(tmp_path), jobs=['gdp_bar', 'life_bar'], processes=2, cache=False)
+    assert sorted(written) == ['gdp_bar', 'life_bar']
+    names = [event['name'] for event in instrument.events()]
+    assert names.count('before_pool') == 1
+    assert instrument.totals()['parent_rows'] == 10
+    pids = {event['pid'] for event in instrument.events() if event['name'] == 'draw:gdp_bar'}
+    assert pids and os.getpid() not in pids
+
+
+@pytest.mark.parametrize('dtype', [object, str])
+def test_pool_renders_frames_with_string_countries(data_csv, tmp_path, dtype):
+    df = loader.load_data(data_csv, cache=False)
+    df['Country'] = df['Country'].astype(dtype)
+    written = render.render_all(df, str(tmp_path), jobs=['gdp_bar', 'life_violin'], processes=2, cache=False)
+    assert sorted(written) == ['gdp_bar', 'life_violin']
+    for path in written.values():
+        assert os.path.getsize(path) > 0
+
+
+def test_pool_and_in_process_renders_select_the_same_years(data_csv, tmp_path):
+    kwargs = dict(path=data_csv, jobs=['gdp_year_bar', 'life_bar'], cache=False, years=[2000, 2015])
+    one = render.render_all(out_dir=str(tmp_path / 'one'), processes=1, **kwargs)
+    two = render.render_all(out_dir=str(tmp_path / 'two'), processes=2, **kwargs)
+    for name in one:
+        with open(one[name], 'rb') as a, open(two[name], 'rb') as b:
+            assert a.read() == b.read()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import resample
+
+
+def _frame(seed=1):
+    rng = np.random.default_rng(seed)
+    countries = np.repeat(['A', 'B', 'C'], 12)
+    gdp = rng.lognormal(25.0, 1.0, size=len(countries))
+    leaby = 60.0 + 3.0 * np.log10(gdp) + rng.normal(0.0, 2.0, size=len(countries))
+    return pd.DataFrame({'Country': countries, 'Year': np.tile(np.arange(2000, 2012), 3),
+                         'GDP': gdp, 'LEABY': leaby})
+
+
+def test_results_depend_on_the_seed_not_the_workers():
+    df = _frame()
+    one = resample.significance(df, resamples=200, seed=7, processes=1)
+    two = resample.significance(df, resamples=200, seed=7, processes=2)
+    pd.testing.assert_frame_equal(one, two)
+    other = resample.significance(df, resamples=200, seed=8, processes=1)
+    assert not np.allclose(one['ci_low'], other['ci_low'])
+
+
+def test_small_blocks_cover_every_resample(monkeypatch):
+    df = _frame()
+    X, Y, n = resample.pack(*(df[value].to_numpy().reshape(3, 12) for value in ('GDP', 'LEABY')))
+    monkeypatch.setattr(resample, 'BLOCK_ELEMENTS', 3 * 12 * 7)
+    out = resample.resample(X, Y, n, 'bootstrap', resamples=50, seed=3, processes=1)
+    assert out.shape == (50, 3)
+    assert np.isfinite(out).all()
+    assert np.array_equal(out, resample.resample(X, Y, n, 'bootstrap', resamples=50, seed=3, processes=2))
+
+
+def test_rows_without_two_pairs_give_nan():
+    x = np.array([[1.0, 2.0, 3.0], [1.0, np.nan, np.nan]])
+    X, Y, n = resample.pack(x, x * 2.0)
+    assert n.tolist() == [3, 1]
+    out = resample.resample(X, Y, n, 'bootstrap', resamples=20, seed=0, processes=1)
+    assert np.isnan(out[:, 1]).all()
+    # A bootstrap of points on a line has r = 1, or none if it drew one point.
+    drawn = out[:, 0][np.isfinite(out[:, 0])]
+    assert len(drawn) and np.allclose(drawn, 1.0)
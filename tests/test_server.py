@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import instrument
+import loader
+from panel import Panel
+import server
+
+
+@pytest.fixture
+def panel(data_csv):
+    return Panel.from_frame(loader.load_data(data_csv, cache=False))
+
+
+def _serve(panel, client):
+    async def main():
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(server.serve(panel, port=0, processes=1, ready=ready.set_result))
+        try:
+            listening = await asyncio.wait_for(ready, 60)
+            port = listening.sockets[0].getsockname()[1]
+            return await asyncio.wait_for(client(port), 60)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_connection_close_gets_eof_after_a_render(panel):
+    async def client(port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /chart/gdp_bar?country=Chile HTTP/1.1\r\nConnection: close\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        return response
+
+    response = _serve(panel, client)
+    assert response.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert b'Content-Type: image/png' in response
+
+
+def test_identical_requests_share_one_render(panel, recording):
+    app = server.ReportServer(panel, processes=1)
+    app.start()
+    try:
+        key = app.request_key('life_bar', {'country': ['Chile,Mexico'], 'years': ['2000-2040']})
+        assert key == ('life_bar', ('Chile', 'Mexico'), None)
+
+        async def burst():
+            return await asyncio.gather(*(app.chart(key) for _ in range(3)))
+
+        images = asyncio.run(burst())
+        assert images[0][:8] == b'\x89PNG\r\n\x1a\n'
+        assert images.count(images[0]) == 3
+        assert asyncio.run(app.chart(key)) == images[0]
+    finally:
+        app.close()
+    totals = instrument.totals()
+    assert totals['renders'] == 1
+    assert totals['coalesced'] == 2
+    assert totals['image_hits'] == 1
+
+
+def test_request_key_rejects_unknown_charts_and_countries(panel):
+    app = server.ReportServer(panel)
+    with pytest.raises(server.RequestError) as e:
+        app.request_key('nope', {})
+    assert e.value.status == 404
+    with pytest.raises(server.RequestError) as e:
+        app.request_key('gdp_bar', {'country': ['Atlantis']})
+    assert e.value.status == 400
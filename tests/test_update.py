@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import loader
+import update
+
+
+def _rows(countries, years, offset=0.0):
+    return pd.DataFrame([
+        {'Country': country, 'Year': year, 'GDP': (i + 1) * 1e11 + j * 1e9 + offset,
+         'LEABY': 50.0 + 4 * i + 0.5 * j + offset}
+        for i, country in enumerate(countries) for j, year in enumerate(years)])
+
+
+def _assert_moments_match_rows(store):
+    df = store.load()
+    for value in update.VALUES:
+        stored = store.moments().loc[value].sort_index()
+        grouped = df.groupby('Country', observed=True)[value]
+        assert stored['count'].tolist() == grouped.count().tolist()
+        assert np.allclose(stored['mean'], grouped.mean())
+        assert np.allclose(stored['m2'], grouped.var(ddof=0) * grouped.count())
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = update.Store(str(tmp_path / 'store'))
+    store.build(_rows(['Chile', 'China'], range(2000, 2010)))
+    return store
+
+
+def test_appended_years_fold_into_the_moments(store):
+    affected = store.upsert(_rows(['Chile', 'Ghana'], range(2010, 2014)))
+    assert affected == ['Chile', 'Ghana']
+    assert len(store.parts()) == 2
+    spans = store.countries()
+    assert spans.loc['Chile', 'last_year'] == 2013
+    assert spans.loc['Ghana', 'rows'] == 4
+    _assert_moments_match_rows(store)
+
+
+def test_partial_column_upsert_keeps_the_other_columns(store):
+    before = store.load(['Chile']).set_index('Year')
+    affected = store.upsert(pd.DataFrame({'Country': ['Chile'], 'Year': [2005], 'GDP': [1.0]}))
+    assert affected == ['Chile']
+    after = store.load(['Chile']).set_index('Year')
+    assert after.loc[2005, 'GDP'] == 1.0
+    assert after.loc[2005, 'LEABY'] == before.loc[2005, 'LEABY']
+    assert len(after) == len(before)
+    _assert_moments_match_rows(store)
+
+
+def test_partial_column_upsert_of_a_new_row_leaves_the_rest_missing(store):
+    store.upsert(pd.DataFrame({'Country': ['Chile'], 'Year': [2010], 'LEABY': [80.0]}))
+    row = store.load(['Chile']).set_index('Year').loc[2010]
+    assert row['LEABY'] == 80.0
+    assert np.isnan(row['GDP'])
+    _assert_moments_match_rows(store)
+
+
+def test_unchanged_rows_are_not_written(store):
+    parts = store.parts()
+    assert store.upsert(_rows(['Chile', 'China'], range(2000, 2010))) == []
+    assert store.parts() == parts
+
+
+def test_original_csv_names_and_dtypes_are_accepted(store):
+    new = _rows(['China'], [2010]).rename(columns={v: k for k, v in loader.RENAME.items()})
+    assert store.upsert(new) == ['China']
+    df = store.load()
+    assert df['Country'].dtype == 'category'
+    assert df['LEABY'].dtype == np.float32
+
+
+def test_compaction_keeps_the_latest_rows(store, monkeypatch):
+    monkeypatch.setattr(update, 'COMPACT_PARTS', 2)
+    for offset in (1.0, 2.0):
+        store.upsert(_rows(['China'], [2001], offset))
+    assert len(store.parts()) == 1
+    row = store.load(['China']).set_index('Year').loc[2001]
+    assert row['GDP'] == _rows(['China'], [2001], 2.0)['GDP'][0]
+    _assert_moments_match_rows(store)
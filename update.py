@@ -0,0 +1,280 @@
+"""Incremental updates of the prepared dataset.
+
+A ``Store`` is a directory holding the prepared rows as a sequence of
+Parquet part files, plus one small table with a row per country: the span
+of years stored for it and the moments (``count``/``mean``/``m2``) of each
+value column.  ``Store.upsert()`` writes only the rows it adds or changes,
+as one new part; a row in a later part replaces the same ``(Country, Year)``
+in earlier ones.  Updates merge column-wise, so an update that only carries
+``GDP`` keeps the stored ``LEABY`` of the row.
+
+Years outside a country's stored span are known to be new without reading
+any stored rows, and their moments are folded in with
+``aggregate.combine()``; only countries with a replaced value are recomputed
+from their stored rows.  Once there are more than ``COMPACT_PARTS`` parts
+they are rewritten as one.  The returned country list is what downstream
+charts need to redraw.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregate import combine, summarize
+import instrument
+import loader
+
+
+KEYS = ['Country', 'Year']
+VALUES = ['GDP', 'LEABY']
+
+DATA_DIR = 'data'
+COUNTRIES_FILE = 'countries.json'
+# Parts are merged into one once an upsert leaves more than this many.
+COMPACT_PARTS = 32
+
+
+def _casts(df, names):
+    return {name: loader.DTYPES[name] for name in names
+            if name in df.columns and df[name].dtype != loader.DTYPES[name]}
+
+
+def _prepare(df):
+    """Coerce ``df`` to the loader schema, with plain string country labels."""
+    df = df.rename(columns=loader.RENAME)
+    casts = _casts(df, [name for name in loader.DTYPES if name != 'Country'])
+    if not pd.api.types.is_string_dtype(df['Country']) or isinstance(df['Country'].dtype, pd.CategoricalDtype):
+        casts['Country'] = str
+    return df.astype(casts) if casts else df
+
+
+def _complete(df):
+    """``df`` with every value column, missing ones as NaN, in store order."""
+    missing = [value for value in VALUES if value not in df.columns]
+    if missing:
+        df = df.assign(**{value: np.nan for value in missing})
+    df = df[KEYS + VALUES]
+    casts = _casts(df, VALUES)
+    return df.astype(casts) if casts else df
+
+
+def _categorize(df):
+    df['Country'] = df['Country'].astype('category')
+    return df
+
+
+def _write(df, path):
+    tmp = path + '.tmp'
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _write_json(data, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _country_index(names):
+    return pd.Index(names, dtype=str, name='Country')
+
+
+def _describe(df):
+    """Year span and per-value moments of the rows ``df``, per country.
+
+    Returns ``{'span': first_year/last_year/rows, value: count/mean/m2}``,
+    all indexed by country.  The moments are those of ``aggregate.moments()``,
+    from ``bincount`` passes over the country codes: on update-sized frames a
+    groupby costs more than the work itself.
+    """
+    codes, names = pd.factorize(df['Country'], sort=True)
+    n = len(names)
+    index = _country_index(names)
+    year = df['Year'].to_numpy()
+    first = np.full(n, np.iinfo(np.int64).max)
+    last = np.full(n, np.iinfo(np.int64).min)
+    np.minimum.at(first, codes, year)
+    np.maximum.at(last, codes, year)
+    meta = {'span': pd.DataFrame({'first_year': first, 'last_year': last,
+                                  'rows': np.bincount(codes, minlength=n)}, index=index)}
+    for value in VALUES:
+        a = df[value].to_numpy(dtype=np.float64)
+        seen = ~np.isnan(a)
+        where = codes[seen]
+        count = np.bincount(where, minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.bincount(where, a[seen], minlength=n) / count
+        m2 = np.bincount(where, (a[seen] - mean[where]) ** 2, minlength=n)
+        meta[value] = pd.DataFrame({'count': count, 'mean': mean, 'm2': m2}, index=index)
+    return meta
+
+
+def _fold(meta, gained):
+    """``meta`` with the description ``gained`` of new rows folded in."""
+    span, more = meta['span'].align(gained['span'], join='outer')
+    out = {'span': pd.DataFrame({
+        'first_year': np.fmin(span['first_year'], more['first_year']),
+        'last_year': np.fmax(span['last_year'], more['last_year']),
+        'rows': span['rows'].fillna(0) + more['rows'].fillna(0),
+    }, index=span.index).astype('int64')}
+    for value in VALUES:
+        out[value] = combine(meta[value], gained[value])
+    return out
+
+
+def _dump(meta):
+    """JSON-ready columns of ``meta``; NaN means stay NaN."""
+    out = {'Country': meta['span'].index.tolist()}
+    for part, frame in meta.items():
+        out[part] = {name: frame[name].tolist() for name in frame.columns}
+    return out
+
+
+def _parse(data):
+    index = _country_index(data.pop('Country'))
+    return {part: pd.DataFrame(columns, index=index) for part, columns in data.items()}
+
+
+def _differs(a, b):
+    return a.ne(b) & ~(a.isna() & b.isna())
+
+
+class Store:
+    """Persisted copy of the prepared data plus per-country moments."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @property
+    def data_dir(self):
+        return os.path.join(self.directory, DATA_DIR)
+
+    @property
+    def countries_path(self):
+        return os.path.join(self.directory, COUNTRIES_FILE)
+
+    def exists(self):
+        return os.path.exists(self.countries_path)
+
+    def parts(self):
+        """Part files, oldest first."""
+        return sorted(glob.glob(os.path.join(self.data_dir, 'part-*.parquet')))
+
+    def _next_part(self):
+        parts = self.parts()
+        number = int(os.path.basename(parts[-1])[len('part-'):-len('.parquet')]) + 1 if parts else 0
+        return os.path.join(self.data_dir, 'part-{:06d}.parquet'.format(number))
+
+    def _read(self, countries=None):
+        filters = None if countries is None else [('Country', 'in', list(countries))]
+        df = pd.concat([pd.read_parquet(part, filters=filters) for part in self.parts()], ignore_index=True)
+        df = df.drop_duplicates(KEYS, keep='last')
+        return df.sort_values(KEYS, kind='stable', ignore_index=True)
+
+    def load(self, countries=None):
+        """The stored rows (of ``countries`` only, if given), sorted by ``KEYS``."""
+        return _categorize(self._read(countries))
+
+    def _meta(self):
+        with open(self.countries_path) as f:
+            return _parse(json.load(f))
+
+    def countries(self):
+        """Per-country ``first_year``, ``last_year`` and ``rows`` stored."""
+        return self._meta()['span']
+
+    def moments(self):
+        """Stored moments indexed by ``(value, Country)``."""
+        meta = self._meta()
+        stats = pd.concat({value: meta[value] for value in VALUES}, names=['value'])
+        return stats.astype({'count': 'int64'})
+
+    def aggregates(self, value):
+        """Per-country ``aggregate.summarize()`` frame of ``value``."""
+        return summarize(self.moments().loc[value])
+
+    def series(self, countries, value, df=None):
+        """``{country: (years, values)}`` line-plot series for ``countries``."""
+        if df is None:
+            df = self.load(countries)
+        rows = df[df['Country'].isin(countries)]
+        return {country: (group['Year'].to_numpy(), group[value].to_numpy())
+                for country, group in rows.groupby('Country', observed=True, sort=False)}
+
+    def build(self, df):
+        """Replace the store's contents with ``df`` (a full rebuild)."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        for part in self.parts():
+            os.remove(part)
+        df = _complete(_prepare(df).drop_duplicates(KEYS, keep='last'))
+        df = df.sort_values(KEYS, kind='stable', ignore_index=True)
+        _write(df, self._next_part())
+        _write_json(_dump(_describe(df)), self.countries_path)
+
+    def compact(self):
+        """Rewrite all parts as one."""
+        parts = self.parts()
+        if len(parts) <= 1:
+            return
+        _write(self._read(), self._next_part())
+        for part in parts:
+            os.remove(part)
+
+    @instrument.stage('upsert')
+    def upsert(self, new):
+        """Merge ``new`` rows into the store; returns the affected countries.
+
+        A row whose ``(Country, Year)`` is already stored updates the value
+        columns ``new`` has and keeps the others.  Only countries with new or
+        changed values are returned and get their moments updated.
+        """
+        if not self.exists():
+            self.build(new)
+            return sorted(pd.unique(new['Country'].astype(str)))
+        new = _prepare(new).drop_duplicates(KEYS, keep='last')
+        instrument.count('rows', len(new))
+        given = [value for value in VALUES if value in new.columns]
+        meta = self._meta()
+
+        span = meta['span'].reindex(new['Country'])
+        year = new['Year'].to_numpy()
+        inside = (year >= span['first_year'].to_numpy()) & (year <= span['last_year'].to_numpy())
+        added = [new[~inside]]
+        changed = None
+        if inside.any():
+            # Only rows within a stored span can exist already; look them up.
+            rows = new[inside]
+            old = self._read(pd.unique(rows['Country']))
+            merged = rows.merge(old, on=KEYS, how='left', suffixes=('', '_old'), indicator=True)
+            found = (merged['_merge'] == 'both').to_numpy()
+            added.append(rows[~found])
+            merged = merged[found]
+            differs = np.zeros(len(merged), dtype=bool)
+            for value in given:
+                differs |= _differs(merged[value], merged[value + '_old']).to_numpy()
+            # Value columns missing from ``new`` come through from the stored row.
+            changed = merged[differs][KEYS + VALUES]
+        added = _complete(pd.concat(added, ignore_index=True) if len(added) > 1 else added[0])
+        replaced = sorted(pd.unique(changed['Country'])) if changed is not None else []
+        affected = sorted(set(added['Country'].unique().tolist()).union(replaced))
+        if not affected:
+            return []
+
+        part = added if not replaced else pd.concat([added, _complete(changed)], ignore_index=True)
+        _write(part.sort_values(KEYS, ignore_index=True), self._next_part())
+
+        appended = added[~added['Country'].isin(replaced)] if replaced else added
+        if len(appended):
+            meta = _fold(meta, _describe(appended))
+        if replaced:
+            fresh = _describe(self._read(replaced))
+            meta = {part: pd.concat([frame.drop(replaced, errors='ignore'), fresh[part]]).sort_index()
+                    for part, frame in meta.items()}
+        _write_json(_dump(meta), self.countries_path)
+        if len(self.parts()) > COMPACT_PARTS:
+            self.compact()
+        return affected